@@ -0,0 +1,43 @@
+"""Client request latency: a fresh connection per call vs the keep-alive pool.
+
+Starts the server with uvicorn on a throwaway data directory and times
+GET /health and GET /comments through urllib.request.urlopen (how
+api_client used to send every request) and through api_client.server_get.
+
+    python benchmarks/bench_client_pool.py [--requests 500] [--seed 50]
+"""
+import argparse
+import os
+import sys
+
+from common import PROJECT_ROOT, call, running_server, seed, summary, timed
+
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint and client")
+    parser.add_argument("--seed", type=int, default=50, help="comments in the project")
+    args = parser.parse_args()
+
+    with running_server() as base:
+        os.environ["SERVER_BASE"] = base
+        import api_client
+
+        project_id = seed(base, args.seed)
+        endpoints = {
+            "/health": ("/health", None),
+            "/comments": ("/comments", {"project_id": project_id}),
+        }
+        for name, (path, params) in endpoints.items():
+            query = f"{path}?project_id={project_id}" if params else path
+            fresh = timed(lambda: call(base, query), args.requests)
+            pooled = timed(lambda: api_client.server_get(path, params=params), args.requests)
+            print(f"GET {name}")
+            print(f"  new connection  {summary(fresh)}")
+            print(f"  keep-alive pool {summary(pooled)}")
+
+
+if __name__ == "__main__":
+    main()
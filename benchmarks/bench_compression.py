@@ -0,0 +1,97 @@
+"""Response size and encode time for a project with many comments.
+
+Starts the server with uvicorn on a throwaway data directory, creates a
+project with 10k comments, then fetches GET /comments with each content
+encoding the server offers and reports bytes on the wire and latency.
+Also times the in-process JSON encoders and compressors on the same list,
+and compares indented vs compact storage snapshots.
+
+    python benchmarks/bench_compression.py [--comments 10000] [--rounds 20]
+"""
+import argparse
+import io
+import json
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List
+
+from common import PROJECT_ROOT, call, running_server, seed, summary, timed
+
+sys.path.insert(0, PROJECT_ROOT)
+from src.compression import Compressor, brotli  # noqa: E402
+from src.storage import encode_json  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BATCH_SIZE = 50
+
+
+def fetch(base: str, path: str, encoding: str) -> bytes:
+    """The raw (still encoded) response body."""
+    req = urllib.request.Request(f"{base}{path}", headers={"Accept-Encoding": encoding})
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return resp.read()
+
+
+def add_comments(base: str, project_id: str, count: int):
+    for start in range(0, count, BATCH_SIZE):
+        calls = [
+            {"method": "POST", "path": "/comments", "body": {"project_id": project_id, "username": "bench_b", "text": f"comment {n}: looks good, but the intro runs a little long"}}
+            for n in range(start, min(count, start + BATCH_SIZE))
+        ]
+        call(base, "/batch", {"requests": calls}, "POST")
+
+
+def time_once(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--comments", type=int, default=10000, help="comments in the project")
+    parser.add_argument("--rounds", type=int, default=20, help="requests per encoding")
+    args = parser.parse_args()
+
+    with running_server() as base:
+        project_id = seed(base, 0)
+        add_comments(base, project_id, args.comments)
+        path = f"/comments?project_id={project_id}"
+        comments: List[Dict[str, Any]] = call(base, path)
+
+        print(f"GET /comments ({len(comments)} comments)")
+        encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+        for encoding in encodings:
+            size = len(fetch(base, path, encoding))
+            print(f"  {encoding:<9} {size:>10,} bytes   {summary(timed(lambda: fetch(base, path, encoding), args.rounds))}")
+
+    print("Encoding the same list in-process")
+    from pydantic import TypeAdapter
+    adapter = TypeAdapter(List[Dict[str, Any]])
+    encoders = {
+        "json.dumps": lambda: json.dumps(comments).encode("utf-8"),
+        "pydantic": lambda: adapter.dump_json(comments),
+    }
+    if orjson is not None:
+        encoders["orjson"] = lambda: orjson.dumps(comments)
+    for name, encode in encoders.items():
+        print(f"  {name:<11} {summary(timed(encode, 10))}")
+    body = adapter.dump_json(comments)
+    for encoding in encodings[1:]:
+        compressed = Compressor(encoding).compress(body, final=True)
+        ms = time_once(lambda: Compressor(encoding).compress(body, final=True))
+        print(f"  {encoding:<11} {len(body):,} -> {len(compressed):,} bytes in {ms:.1f} ms")
+
+    print("Storage snapshot of the comments collection (before: json.dump with indent=2)")
+    indented = json.dumps(comments, ensure_ascii=False, indent=2).encode("utf-8")
+    print(f"  indent=2    {len(indented):>10,} bytes   {summary(timed(lambda: json.dump(comments, io.StringIO(), ensure_ascii=False, indent=2), 5))}")
+    print(f"  compact     {len(encode_json(comments)):>10,} bytes   {summary(timed(lambda: encode_json(comments), 5))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Login throughput, and what a login storm does to other requests.
+
+Starts the server with uvicorn on a throwaway data directory, registers a
+few users, then has client threads log in as fast as they can while GET
+/health is probed. Reports logins/s, login latency and /health latency
+next to an idle baseline.
+
+    python benchmarks/bench_login.py [--clients 16] [--seconds 5] [--scheme scrypt]
+
+--scheme picks FLASHGIG_PASSWORD_SCHEME (scrypt or pbkdf2_sha256); pass
+FLASHGIG_HASH_THREADS as usual to size the hashing pool.
+"""
+import argparse
+import threading
+import time
+import urllib.error
+
+from common import call, running_server, summary, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16, help="concurrent login loops")
+    parser.add_argument("--seconds", type=float, default=5, help="how long the storm lasts")
+    parser.add_argument("--probes", type=int, default=200, help="/health requests per measurement")
+    parser.add_argument("--scheme", default="scrypt", help="password hashing scheme")
+    args = parser.parse_args()
+
+    with running_server(FLASHGIG_PASSWORD_SCHEME=args.scheme) as base:
+        users = [f"login_{n}" for n in range(4)]
+        for username in users:
+            call(base, "/register", {"username": username, "password": "benchpass"}, "POST")
+
+        print(f"Idle ({args.scheme})")
+        print(f"  POST /login  {summary(timed(lambda: call(base, '/login', {'username': users[0], 'password': 'benchpass'}, 'POST'), 20))}")
+        print(f"  GET /health  {summary(timed(lambda: call(base, '/health'), args.probes))}")
+
+        stop = threading.Event()
+        latencies = [[] for _ in range(args.clients)]
+        busy = [0] * args.clients
+
+        def client(n: int):
+            body = {"username": users[n % len(users)], "password": "benchpass"}
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    call(base, "/login", body, "POST")
+                except urllib.error.HTTPError as e:
+                    if e.code != 503:
+                        raise
+                    busy[n] += 1
+                    time.sleep(0.05)
+                    continue
+                latencies[n].append((time.perf_counter() - start) * 1000)
+
+        threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(args.clients)]
+        for t in threads:
+            t.start()
+        started = time.perf_counter()
+        print(f"With {args.clients} clients logging in")
+        try:
+            print(f"  GET /health  {summary(timed(lambda: call(base, '/health'), args.probes))}")
+            time.sleep(max(0.0, args.seconds - (time.perf_counter() - started)))
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
+        elapsed = time.perf_counter() - started
+        samples = [ms for client_samples in latencies for ms in client_samples]
+        print(f"  POST /login  {summary(samples)}")
+        print(f"  logins: {len(samples)} ({len(samples) / elapsed:.1f}/s), busy (503): {sum(busy)}")
+
+
+if __name__ == "__main__":
+    main()
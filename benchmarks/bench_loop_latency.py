@@ -0,0 +1,59 @@
+"""Read latency of the server while comments are being written.
+
+Starts the server with uvicorn on a throwaway data directory, then probes
+GET /health and GET /comments, first on an idle server and then while
+writer threads keep posting comments. Reports p50/p99/max per endpoint.
+
+    python benchmarks/bench_loop_latency.py [--writers 8] [--probes 300] [--seed 2000]
+
+Pass FLASHGIG_STORAGE / FLASHGIG_JOURNAL as usual to benchmark other backends.
+"""
+import argparse
+import threading
+import time
+
+from common import call, running_server, seed, summary, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8, help="concurrent comment writers")
+    parser.add_argument("--probes", type=int, default=300, help="requests per probed endpoint")
+    parser.add_argument("--seed", type=int, default=2000, help="comments created before measuring")
+    args = parser.parse_args()
+
+    with running_server() as base:
+        project_id = seed(base, args.seed)
+        paths = {"/health": "/health", "/comments": f"/comments?project_id={project_id}"}
+
+        print(f"Idle ({args.seed} comments in the project)")
+        for name, path in paths.items():
+            print(f"  GET {name:<10} {summary(timed(lambda: call(base, path), args.probes))}")
+
+        stop = threading.Event()
+        written = [0] * args.writers
+
+        def writer(n: int):
+            while not stop.is_set():
+                call(base, "/comments", {"project_id": project_id, "username": "bench_b", "text": "load"}, "POST")
+                written[n] += 1
+
+        threads = [threading.Thread(target=writer, args=(n,), daemon=True) for n in range(args.writers)]
+        for t in threads:
+            t.start()
+        started = time.perf_counter()
+        print(f"With {args.writers} concurrent writers")
+        try:
+            for name, path in paths.items():
+                print(f"  GET {name:<10} {summary(timed(lambda: call(base, path), args.probes))}")
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
+        elapsed = time.perf_counter() - started
+        print(f"  writes: {sum(written)} ({sum(written) / elapsed:.0f}/s)")
+        print(f"  metrics: {call(base, '/metrics')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Helpers shared by the benchmarks: a throwaway server and latency stats."""
+import contextlib
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def call(base: str, path: str, data=None, method="GET"):
+    """One request on a fresh connection, the way api_client used to work."""
+    body = json.dumps(data).encode("utf-8") if data is not None else None
+    req = urllib.request.Request(
+        f"{base}{path}", data=body, method=method,
+        headers={"Content-Type": "application/json"} if body else {},
+    )
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return json.loads(resp.read() or b"null")
+
+
+@contextlib.contextmanager
+def running_server(**env):
+    """Runs the server with uvicorn on a temp data dir and yields its base URL."""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as data_dir:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.server:app", "--port", str(port), "--log-level", "warning"],
+            cwd=PROJECT_ROOT, env=dict(os.environ, FLASHGIG_DATA_DIR=data_dir, **env), stdout=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.time() + 20
+            while True:
+                try:
+                    call(base, "/health")
+                    break
+                except OSError:
+                    if time.time() > deadline:
+                        raise RuntimeError("server did not start")
+                    time.sleep(0.1)
+            yield base
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def seed(base: str, comments: int) -> str:
+    """Creates two users, an accepted connection and a project with comments; returns the project id."""
+    call(base, "/register", {"username": "bench_a", "password": "benchpass"}, "POST")
+    call(base, "/register", {"username": "bench_b", "password": "benchpass"}, "POST")
+    req = call(base, "/requests", {"from_username": "bench_a", "to_username": "bench_b", "project_name": "Bench"}, "POST")
+    call(base, f"/requests/{req['id']}", {"status": "accepted"}, "PATCH")
+    project = call(base, "/projects", {"request_id": req["id"], "title": "Bench"}, "POST")
+    for i in range(comments):
+        call(base, "/comments", {"project_id": project["id"], "username": "bench_a", "text": f"seed {i}"}, "POST")
+    return project["id"]
+
+
+def timed(fn, n: int):
+    """Calls fn() n times; returns the latencies in milliseconds."""
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summary(samples) -> str:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50 {statistics.median(samples):7.2f} ms   p99 {p99:7.2f} ms   max {samples[-1]:7.2f} ms"
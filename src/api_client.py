@@ -1,52 +1,445 @@
+import codecs
+import contextlib
+import http
+import http.client
 import json
 import os
-import urllib.request
-import urllib.error
+import select
+import threading
+import time
 import urllib.parse
-from typing import Dict, Any, Optional, List
+import zlib
+from collections import OrderedDict, deque
+from typing import Dict, Any, Iterator, Optional, List, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is accepted
+    brotli = None
 
 SERVER_BASE = os.environ.get("SERVER_BASE", "http://127.0.0.1:8000")
 
 
 class APIClientError(Exception):
-    """Custom exception for API client errors."""
-    pass
+    """Custom exception for API client errors.
 
+    `status` is the HTTP status when the server answered with an error, else None.
+    """
 
-def _server_request(
+    def __init__(self, message: str = "", status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+# --- Connection Pool ---
+
+# Failures that mean the connection died, not that the server rejected the request
+_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionError, BrokenPipeError, http.client.CannotSendRequest)
+# Failures while sending, before the server can have seen the whole request
+_SEND_ERRORS = (BrokenPipeError, http.client.CannotSendRequest)
+_RETRY_STATUSES = (502, 503, 504)
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+ACCEPT_ENCODING = "br, gzip" if brotli is not None else "gzip"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _BodyDecoder:
+    """Undoes a response's Content-Encoding, chunk by chunk."""
+
+    def __init__(self, encoding: Optional[str]):
+        encoding = (encoding or "identity").strip().lower()
+        if encoding == "gzip":
+            self._decompress = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
+        elif encoding == "br" and brotli is not None:
+            self._decompress = brotli.Decompressor().process
+        elif encoding == "identity":
+            self._decompress = bytes
+        else:
+            raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+    def decode(self, data: bytes) -> bytes:
+        return self._decompress(data)
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections, reused across calls.
+
+    At most `max_per_host` requests run against one host at a time (extra
+    callers wait for a free slot) and at most `max_size` idle connections
+    are kept in total. Idempotent requests that hit a connection error or
+    a 502/503/504 are retried `retries` times with exponential backoff
+    starting at `backoff` seconds. Other requests are only retried when a
+    reused keep-alive connection fails while the request is being sent;
+    once it is sent, the server may have applied it, so a failure while
+    reading the response is raised. Idle connections the server has
+    already closed are dropped before reuse.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10,
+        max_per_host: int = 4,
+        timeout: float = 5,
+        retries: int = 2,
+        backoff: float = 0.2,
+    ):
+        self.max_size = max_size
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[str, str, int], deque] = {}
+        self._idle_count = 0
+        self._slots: Dict[Tuple[str, str, int], threading.BoundedSemaphore] = {}
+
+    def _slot(self, key) -> threading.BoundedSemaphore:
+        with self._lock:
+            if key not in self._slots:
+                self._slots[key] = threading.BoundedSemaphore(self.max_per_host)
+            return self._slots[key]
+
+    def _checkout(self, key) -> Tuple[http.client.HTTPConnection, bool]:
+        """Returns an idle connection for `key` (reused=True) or a new one."""
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    break
+                self._idle_count -= 1
+                conn = idle.pop()
+            if conn.sock is not None and not select.select([conn.sock], [], [], 0)[0]:
+                return conn, True
+            conn.close()  # readable while idle: the server closed it (EOF)
+        scheme, host, port = key
+        conn_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return conn_class(host, port, timeout=self.timeout), False
+
+    def _checkin(self, key, conn: http.client.HTTPConnection):
+        with self._lock:
+            if self._idle_count < self.max_size:
+                self._idle.setdefault(key, deque()).append(conn)
+                self._idle_count += 1
+                return
+        conn.close()
+
+    @staticmethod
+    def _target(url: str) -> Tuple[Tuple[str, str, int], str]:
+        parts = urllib.parse.urlsplit(url)
+        default_port = 443 if parts.scheme == "https" else 80
+        key = (parts.scheme, parts.hostname, parts.port or default_port)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        return key, target
+
+    def request(
+        self, method: str, url: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, str, http.client.HTTPMessage, bytes]:
+        """Sends a request and returns (status, reason, headers, body).
+
+        Asks for a compressed response and returns the body decompressed.
+        """
+        key, target = self._target(url)
+        headers = {"Accept-Encoding": ACCEPT_ENCODING, **(headers or {})}
+
+        attempt = 0
+        with self._slot(key):
+            while True:
+                conn, reused = self._checkout(key)
+                sent = False
+                try:
+                    conn.request(method, target, body=body, headers=headers)
+                    sent = True
+                    resp = conn.getresponse()
+                    data = _BodyDecoder(resp.headers.get("Content-Encoding")).decode(resp.read())
+                except Exception as e:
+                    conn.close()
+                    stale = reused and not sent and isinstance(e, _SEND_ERRORS)
+                    retryable = method in _IDEMPOTENT_METHODS and isinstance(e, _CONNECTION_ERRORS + (TimeoutError,))
+                    if stale and not retryable:
+                        continue  # dead keep-alive connection: retry right away on a fresh one
+                    if retryable and attempt < self.retries:
+                        time.sleep(self.backoff * 2 ** attempt)
+                        attempt += 1
+                        continue
+                    raise
+
+                if resp.will_close:
+                    conn.close()
+                else:
+                    self._checkin(key, conn)
+                if resp.status in _RETRY_STATUSES and method in _IDEMPOTENT_METHODS and attempt < self.retries:
+                    time.sleep(self.backoff * 2 ** attempt)
+                    attempt += 1
+                    continue
+                return resp.status, resp.reason, resp.headers, data
+
+    @contextlib.contextmanager
+    def stream(self, method: str, url: str, headers: Optional[Dict[str, str]] = None):
+        """Sends a bodiless request; yields (status, reason, headers, chunks) before reading the body.
+
+        `chunks` iterates the decompressed body as it arrives. The connection
+        goes back to the pool only if the body was read to the end. There are
+        no retries, except on a dead keep-alive connection.
+        """
+        key, target = self._target(url)
+        headers = {"Accept-Encoding": ACCEPT_ENCODING, **(headers or {})}
+
+        with self._slot(key):
+            while True:
+                conn, reused = self._checkout(key)
+                try:
+                    conn.request(method, target, headers=headers)
+                    resp = conn.getresponse()
+                    decoder = _BodyDecoder(resp.headers.get("Content-Encoding"))
+                except Exception as e:
+                    conn.close()
+                    if reused and isinstance(e, _CONNECTION_ERRORS):
+                        continue
+                    raise
+                break
+
+            def chunks() -> Iterator[bytes]:
+                while True:
+                    raw = resp.read1(STREAM_CHUNK_SIZE)
+                    if not raw:
+                        resp.read()  # marks the response finished, so the connection can be reused
+                        return
+                    data = decoder.decode(raw)
+                    if data:
+                        yield data
+
+            try:
+                yield resp.status, resp.reason, resp.headers, chunks()
+            except BaseException:
+                conn.close()
+                raise
+            if resp.isclosed() and not resp.will_close:
+                self._checkin(key, conn)
+            else:
+                conn.close()
+
+    def close(self):
+        """Closes all idle connections."""
+        with self._lock:
+            idle, self._idle, self._idle_count = self._idle, {}, 0
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+_pool = ConnectionPool()
+
+
+def configure_pool(**options) -> ConnectionPool:
+    """Replaces the shared pool, e.g. configure_pool(max_per_host=8, retries=3)."""
+    global _pool
+    old, _pool = _pool, ConnectionPool(**options)
+    old.close()
+    return _pool
+
+
+# --- Session ---
+
+_session_token: Optional[str] = None
+
+
+def set_session_token(token: Optional[str]):
+    """Sends `token` (from /login) with every request from now on; None stops sending one.
+
+    With a token the server knows who is calling without looking the user
+    up, and rejects calls that act as anyone else.
+    """
+    global _session_token
+    _session_token = token
+    response_cache.clear()
+
+
+def session_headers() -> Dict[str, str]:
+    """The Authorization header for the current session, if there is one."""
+    return {"Authorization": f"Bearer {_session_token}"} if _session_token else {}
+
+
+# --- Response Cache ---
+
+class CacheEntry:
+    """A decoded GET response and the validators the server sent with it."""
+
+    __slots__ = ("data", "etag", "last_modified", "stored_at")
+
+    def __init__(self, data: Optional[Dict | List], etag: Optional[str], last_modified: Optional[str]):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.monotonic()
+
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers; empty if the server sent no validators."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """LRU of GET responses keyed by path and query parameters.
+
+    Entries younger than `ttl` seconds are served without a request. Older
+    ones are revalidated with If-None-Match / If-Modified-Since, and a 304
+    renews them without downloading the body again. At most `max_entries`
+    are kept; the least recently used go first.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 10):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, data: Optional[Dict | List], headers) -> CacheEntry:
+        entry = CacheEntry(data, headers.get("ETag"), headers.get("Last-Modified"))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            size = len(self._entries)
+        return {"entries": size, "hits": self.hits, "misses": self.misses, "revalidated": self.revalidated}
+
+
+response_cache = ResponseCache()
+
+
+def configure_cache(**options) -> ResponseCache:
+    """Replaces the shared response cache, e.g. configure_cache(ttl=30, max_entries=512)."""
+    global response_cache
+    response_cache = ResponseCache(**options)
+    return response_cache
+
+
+def cache_key(path: str, params: Optional[Dict[str, str]] = None) -> str:
+    return f"{path}?{urllib.parse.urlencode(sorted(params.items()))}" if params else path
+
+
+def cache_lookup(path: str, params: Optional[Dict[str, str]], max_age: Optional[float]) -> Tuple[str, Optional[CacheEntry], bool]:
+    """Returns (key, entry, fresh) for a cached GET; `max_age` overrides the cache TTL."""
+    key = cache_key(path, params)
+    entry = response_cache.get(key)
+    fresh = entry is not None and entry.age() < (response_cache.ttl if max_age is None else max_age)
+    if fresh:
+        response_cache.hits += 1
+    return key, entry, fresh
+
+
+def cache_store(key: str, entry: Optional[CacheEntry], status: int, headers, data) -> Optional[Dict | List]:
+    """Records the answer to a (conditional) GET and returns the data to use."""
+    if status == 304 and entry is not None:
+        response_cache.revalidated += 1
+        entry.stored_at = time.monotonic()
+        return entry.data
+    response_cache.misses += 1
+    return response_cache.put(key, data, headers).data
+
+
+def _send(
     path: str,
     method: str,
     data: Optional[dict] = None,
     params: Optional[Dict[str, str]] = None,
-) -> Optional[Dict | List]:
-    """Generic helper to talk to the local server."""
+    headers: Optional[Dict[str, str]] = None,
+) -> Tuple[int, Any, Optional[Dict | List]]:
+    """Sends a request; returns (status, headers, decoded body). A 304 has no body."""
     query_string = f"?{urllib.parse.urlencode(params)}" if params else ""
     url = f"{SERVER_BASE}{path}{query_string}"
 
     body = json.dumps(data).encode("utf-8") if data is not None else None
-    headers = {"Content-Type": "application/json"} if body else {}
-
-    req = urllib.request.Request(url, data=body, headers=headers, method=method)
+    headers = {**session_headers(), **(headers or {})}
+    if body:
+        headers["Content-Type"] = "application/json"
 
     try:
-        with urllib.request.urlopen(req, timeout=5) as resp:
-            response_text = resp.read().decode("utf-8")
-            return json.loads(response_text) if response_text else None
-    except urllib.error.HTTPError as e:
-        error_message = f"HTTP Error {e.code}: {e.reason}"
+        status, reason, resp_headers, raw = _pool.request(method, url, body=body, headers=headers)
+    except Exception as e:
+        error_message = f"An unexpected error occurred: {e}"
         print(error_message)
         raise APIClientError(error_message) from e
+
+    if status >= 400:
+        error_message = f"HTTP Error {status}: {reason}"
+        print(error_message)
+        raise APIClientError(error_message, status)
+    if status == 304:
+        return status, resp_headers, None
+
+    try:
+        response_text = raw.decode("utf-8")
+        return status, resp_headers, json.loads(response_text) if response_text else None
     except Exception as e:
         error_message = f"An unexpected error occurred: {e}"
         print(error_message)
         raise APIClientError(error_message) from e
 
 
+def _server_request(
+    path: str,
+    method: str,
+    data: Optional[dict] = None,
+    params: Optional[Dict[str, str]] = None,
+) -> Optional[Dict | List]:
+    """Generic helper to talk to the local server."""
+    try:
+        return _send(path, method, data, params)[2]
+    finally:
+        if method not in _IDEMPOTENT_METHODS:
+            response_cache.clear()  # any write may change what cached reads would return
+
+
 def server_get(path: str, params: Optional[Dict[str, str]] = None) -> Optional[Dict | List]:
     """Helper for GET requests."""
     return _server_request(path, "GET", params=params)
 
 
+def cached_get(
+    path: str, params: Optional[Dict[str, str]] = None, max_age: Optional[float] = None
+) -> Optional[Dict | List]:
+    """GET through the response cache.
+
+    Returns the cached data while it is younger than `max_age` (default:
+    the cache TTL), otherwise revalidates it with the server. Pass
+    max_age=0 to always revalidate. Writes made through this client clear
+    the cache.
+    """
+    key, entry, fresh = cache_lookup(path, params, max_age)
+    if fresh:
+        return entry.data
+    status, headers, data = _send(path, "GET", params=params, headers=entry.validators() if entry else None)
+    return cache_store(key, entry, status, headers, data)
+
+
 def server_post(path: str, data: dict) -> Optional[Dict | List]:
     """Helper for POST requests."""
     return _server_request(path, "POST", data=data)
@@ -57,6 +450,218 @@ def server_patch(path: str, data: dict) -> Optional[Dict | List]:
     return _server_request(path, "PATCH", data=data)
 
 
+def server_get_page(
+    path: str,
+    params: Optional[Dict[str, str]] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetches one page of a list endpoint, newest first.
+
+    Returns the records and the cursor for the next (older) page, which is
+    None on the last page.
+    """
+    params = dict(params or {}, limit=str(limit))
+    if cursor:
+        params["cursor"] = cursor
+    page = server_get(path, params=params) or {}
+    return page.get("items", []), page.get("next_cursor")
+
+
+# --- Streaming ---
+
+class JSONArrayParser:
+    """Incremental parser for a JSON array body: feed it bytes, get back the items completed so far."""
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._after_item = False
+        self._done = False
+
+    def feed(self, data: bytes, final: bool = False) -> List[Any]:
+        """Parses `data`; pass final=True with the last chunk. Raises ValueError on malformed input."""
+        self._buffer = self._buffer[self._pos:] + self._utf8.decode(data, final)
+        self._pos = 0
+        items = []
+        while not self._done:
+            pos = self._pos
+            while pos < len(self._buffer) and self._buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(self._buffer):
+                break
+            char = self._buffer[pos]
+            if not self._started:
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                self._started, self._pos = True, pos + 1
+            elif char == "]":
+                self._done, self._pos = True, pos + 1
+            elif self._after_item:
+                if char != ",":
+                    raise ValueError("Expected ',' or ']' in JSON array")
+                self._after_item, self._pos = False, pos + 1
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(self._buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break  # the item isn't complete yet
+                # A value at the very end of the buffer may be cut short (e.g. a number)
+                if end == len(self._buffer) and not final:
+                    break
+                items.append(item)
+                self._after_item, self._pos = True, end
+        if final and not self._done:
+            raise ValueError("Unterminated JSON array")
+        return items
+
+
+class NDJSONParser:
+    """Incremental parser for newline-delimited JSON: one record per line."""
+
+    def __init__(self):
+        self._buffer = b""
+
+    def feed(self, data: bytes, final: bool = False) -> List[Any]:
+        """Parses `data` and returns the records whose line is now complete."""
+        lines = (self._buffer + data).split(b"\n")
+        self._buffer = b"" if final else lines.pop()
+        return [json.loads(line) for line in lines if line.strip()]
+
+
+def _stream_records(path: str, params: Optional[Dict[str, str]], parser) -> Iterator[Dict[str, Any]]:
+    query_string = f"?{urllib.parse.urlencode(params)}" if params else ""
+    url = f"{SERVER_BASE}{path}{query_string}"
+    try:
+        with _pool.stream("GET", url, headers=session_headers()) as (status, reason, _, chunks):
+            if status >= 400:
+                error_message = f"HTTP Error {status}: {reason}"
+                print(error_message)
+                raise APIClientError(error_message, status)
+            for chunk in chunks:
+                yield from parser.feed(chunk)
+            yield from parser.feed(b"", final=True)
+    except APIClientError:
+        raise
+    except Exception as e:
+        error_message = f"An unexpected error occurred: {e}"
+        print(error_message)
+        raise APIClientError(error_message) from e
+
+
+def stream_list(path: str, params: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+    """Yields the records of a list endpoint (e.g. "/comments") as they arrive.
+
+    The first records are available before the whole response has been
+    downloaded or decoded, so a view can render them right away. Raises
+    APIClientError like server_get, also if the stream breaks halfway.
+    """
+    return _stream_records(path, params, JSONArrayParser())
+
+
+def stream_export(kind: str, params: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+    """Yields the records of an NDJSON export ("comments", "projects" or "requests").
+
+    Exports cover a whole history and are read line by line, so neither side
+    ever holds all of it in memory. Raises APIClientError like stream_list.
+    """
+    return _stream_records(f"/export/{kind}", params, NDJSONParser())
+
+
+# --- Batching ---
+
+class BatchCall:
+    """A call queued in a `batch()` block; its result is available once the block exits."""
+
+    def __init__(self, method: str, path: str, data: Optional[dict] = None):
+        self.method = method
+        self.path = path
+        self.data = data
+        self.status: Optional[int] = None
+        self.body: Optional[Dict | List] = None
+        self.sent = False
+
+    def result(self) -> Optional[Dict | List]:
+        """The response body; raises APIClientError like the matching server_* helper would."""
+        if not self.sent:
+            error_message = "The batch has not been sent yet"
+        elif self.status is None:
+            error_message = "Skipped after an earlier call in the batch failed"
+        elif self.status >= 400:
+            try:
+                reason = http.HTTPStatus(self.status).phrase
+            except ValueError:
+                reason = ""
+            error_message = f"HTTP Error {self.status}: {reason}"
+        else:
+            return self.body
+        print(error_message)
+        raise APIClientError(error_message, self.status if self.sent else None)
+
+
+class Batch:
+    """Collects calls and sends them to `/batch` in one round trip; see `batch()`."""
+
+    def __init__(self, stop_on_error: bool = False):
+        self.stop_on_error = stop_on_error
+        self.calls: List[BatchCall] = []
+
+    def _queue(self, method: str, path: str, data: Optional[dict] = None) -> BatchCall:
+        call = BatchCall(method, path, data)
+        self.calls.append(call)
+        return call
+
+    def get(self, path: str, params: Optional[Dict[str, str]] = None) -> BatchCall:
+        return self._queue("GET", f"{path}?{urllib.parse.urlencode(params)}" if params else path)
+
+    def post(self, path: str, data: dict) -> BatchCall:
+        return self._queue("POST", path, data)
+
+    def patch(self, path: str, data: dict) -> BatchCall:
+        return self._queue("PATCH", path, data)
+
+    def send(self):
+        """Sends the queued calls. Raises APIClientError if the batch itself fails."""
+        if not self.calls:
+            return
+        payload = {
+            "requests": [{"method": c.method, "path": c.path, "body": c.data} for c in self.calls],
+            "stop_on_error": self.stop_on_error,
+        }
+        try:
+            responses = (_send("/batch", "POST", data=payload)[2] or {}).get("responses", [])
+        finally:
+            if any(c.method not in _IDEMPOTENT_METHODS for c in self.calls):
+                response_cache.clear()
+        for call, response in zip(self.calls, responses):
+            call.status, call.body, call.sent = response.get("status"), response.get("body"), True
+
+    def __enter__(self) -> "Batch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.send()
+
+
+def batch(stop_on_error: bool = False) -> Batch:
+    """Sends the calls made inside a `with` block together, in order.
+
+        with batch() as b:
+            health = b.get("/health")
+            user = b.post("/login", {"username": ..., "password": ...})
+        user.result()  # raises APIClientError on an error status
+
+    With stop_on_error, calls after the first failing one are skipped.
+    """
+    return Batch(stop_on_error)
+
+
 # --- Convenience Functions ---
 
 def get_user_connections(username: str) -> List[Dict[str, Any]]:
@@ -83,6 +688,52 @@ def get_project_comments(project_id: str) -> List[Dict[str, Any]]:
         return []
 
 
+def iter_project_comments(project_id: str) -> Iterator[Dict[str, Any]]:
+    """Yield all comments for a project as they arrive; raises APIClientError"""
+    return stream_list("/comments", {"project_id": project_id})
+
+
+def export_project_comments(project_id: str) -> Iterator[Dict[str, Any]]:
+    """Yield every comment of a project, oldest first, from the NDJSON export"""
+    return stream_export("comments", {"project_id": project_id})
+
+
+def export_user_projects(username: str) -> Iterator[Dict[str, Any]]:
+    """Yield every project of a user's accepted connections from the NDJSON export"""
+    return stream_export("projects", {"user": username})
+
+
+def export_user_connections(username: str) -> Iterator[Dict[str, Any]]:
+    """Yield every connection request a user sent or received from the NDJSON export"""
+    return stream_export("requests", {"user": username})
+
+
+def get_user_connections_page(
+    username: str, limit: int = 50, cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Get one page of a user's connections and the next cursor"""
+    return server_get_page("/requests", {"user": username}, limit, cursor)
+
+
+def get_user_projects_page(
+    username: str, limit: int = 50, cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Get one page of a user's projects and the next cursor"""
+    return server_get_page("/projects", {"user": username}, limit, cursor)
+
+
+def get_project_comments_page(
+    project_id: str, limit: int = 50, cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Get one page of a project's comments (newest first) and the next cursor"""
+    return server_get_page("/comments", {"project_id": project_id}, limit, cursor)
+
+
+def get_project_workspace(project_id: str, comments_limit: int = 50) -> Dict[str, Any]:
+    """Get a project with its connection, participants and first page of comments in one request"""
+    return server_get(f"/projects/{project_id}/workspace", params={"limit": str(comments_limit)}) or {}
+
+
 # --- Example Usage ---
 if __name__ == "__main__":
     print("--- Testing API Client ---")
@@ -106,4 +757,4 @@ if __name__ == "__main__":
     except APIClientError as e:
         print(f"\nAn API error occurred: {e}")
 
-    print("--- Test Complete ---")
\ No newline at end of file
+    print("--- Test Complete ---")
@@ -0,0 +1,231 @@
+# Async counterpart of api_client for Flet's async handlers and page.run_task.
+# Requests share one keep-alive httpx.AsyncClient per event loop, so several
+# can be in flight at once without blocking the UI. Errors are the same
+# APIClientError, with the same messages, as the blocking client raises, and
+# cached_get shares the blocking client's response cache. Identical GETs in
+# flight at the same time share one request. httpx asks for compressed
+# responses and decompresses them itself.
+import asyncio
+import json
+from typing import AsyncIterator, Dict, Any, Optional, List, Tuple
+
+import httpx
+
+import api_client
+from api_client import APIClientError
+
+_options: Dict[str, Any] = {"max_connections": 10, "max_keepalive": 10, "timeout": 5, "retries": 2}
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+# GETs in flight, by loop, URL and request headers
+_inflight: Dict[Tuple[int, str, Tuple], asyncio.Future] = {}
+# The server sends a keep-alive every 15 seconds on idle event streams
+EVENTS_READ_TIMEOUT = 45
+
+
+def configure_async_client(**options):
+    """Changes client limits, e.g. configure_async_client(max_connections=20).
+
+    Options: max_connections, max_keepalive, timeout, retries (connection
+    failures only). Takes effect for clients created afterwards.
+    """
+    global _client, _client_loop
+    _options.update(options)
+    _client, _client_loop = None, None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """The shared client for the running loop; an AsyncClient can't move between loops."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=_options["timeout"],
+            limits=httpx.Limits(
+                max_connections=_options["max_connections"],
+                max_keepalive_connections=_options["max_keepalive"],
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=_options["retries"]),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def _send(
+    path: str,
+    method: str,
+    data: Optional[dict] = None,
+    params: Optional[Dict[str, str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Tuple[int, Any, Optional[Dict | List]]:
+    """Sends a request; returns (status, headers, decoded body). A 304 has no body.
+
+    A GET identical to one already in flight (same URL, headers and session)
+    waits for that one instead of sending another, and gets the same decoded
+    body.
+    """
+    if method != "GET":
+        return await _request(path, method, data, params, headers)
+    key = (
+        id(asyncio.get_running_loop()),
+        api_client.cache_key(path, params),
+        tuple(sorted({**api_client.session_headers(), **(headers or {})}.items())),
+    )
+    task = _inflight.get(key)
+    if task is None:
+        task = _inflight[key] = asyncio.ensure_future(_request(path, method, data, params, headers))
+        task.add_done_callback(lambda done: _inflight.pop(key) if _inflight.get(key) is done else None)
+    # A caller that gets cancelled must not cancel the request the others wait on
+    return await asyncio.shield(task)
+
+
+async def _request(
+    path: str,
+    method: str,
+    data: Optional[dict],
+    params: Optional[Dict[str, str]],
+    headers: Optional[Dict[str, str]],
+) -> Tuple[int, Any, Optional[Dict | List]]:
+    body = json.dumps(data).encode("utf-8") if data is not None else None
+    headers = {**api_client.session_headers(), **(headers or {})}
+    if body:
+        headers["Content-Type"] = "application/json"
+
+    try:
+        resp = await _get_client().request(
+            method, f"{api_client.SERVER_BASE}{path}", params=params, content=body, headers=headers
+        )
+    except Exception as e:
+        error_message = f"An unexpected error occurred: {e}"
+        print(error_message)
+        raise APIClientError(error_message) from e
+
+    if resp.status_code >= 400:
+        error_message = f"HTTP Error {resp.status_code}: {resp.reason_phrase}"
+        print(error_message)
+        raise APIClientError(error_message, resp.status_code)
+    if resp.status_code == 304:
+        return resp.status_code, resp.headers, None
+
+    try:
+        return resp.status_code, resp.headers, resp.json() if resp.content else None
+    except Exception as e:
+        error_message = f"An unexpected error occurred: {e}"
+        print(error_message)
+        raise APIClientError(error_message) from e
+
+
+async def _server_request(
+    path: str,
+    method: str,
+    data: Optional[dict] = None,
+    params: Optional[Dict[str, str]] = None,
+) -> Optional[Dict | List]:
+    """Generic helper to talk to the local server."""
+    try:
+        return (await _send(path, method, data, params))[2]
+    finally:
+        if method != "GET":
+            api_client.response_cache.clear()
+
+
+async def server_get(path: str, params: Optional[Dict[str, str]] = None) -> Optional[Dict | List]:
+    """Helper for GET requests."""
+    return await _server_request(path, "GET", params=params)
+
+
+async def cached_get(
+    path: str, params: Optional[Dict[str, str]] = None, max_age: Optional[float] = None
+) -> Optional[Dict | List]:
+    """GET through the shared response cache; see api_client.cached_get."""
+    key, entry, fresh = api_client.cache_lookup(path, params, max_age)
+    if fresh:
+        return entry.data
+    status, headers, data = await _send(path, "GET", params=params, headers=entry.validators() if entry else None)
+    return api_client.cache_store(key, entry, status, headers, data)
+
+
+async def server_post(path: str, data: dict) -> Optional[Dict | List]:
+    """Helper for POST requests."""
+    return await _server_request(path, "POST", data=data)
+
+
+async def server_patch(path: str, data: dict) -> Optional[Dict | List]:
+    """Helper for PATCH requests."""
+    return await _server_request(path, "PATCH", data=data)
+
+
+async def server_get_page(
+    path: str,
+    params: Optional[Dict[str, str]] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetches one page of a list endpoint; see api_client.server_get_page."""
+    params = dict(params or {}, limit=str(limit))
+    if cursor:
+        params["cursor"] = cursor
+    page = await server_get(path, params=params) or {}
+    return page.get("items", []), page.get("next_cursor")
+
+
+async def stream_list(path: str, params: Optional[Dict[str, str]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Yields the records of a list endpoint as they arrive; see api_client.stream_list."""
+    try:
+        async with _get_client().stream(
+            "GET", f"{api_client.SERVER_BASE}{path}", params=params, headers=api_client.session_headers()
+        ) as resp:
+            if resp.status_code >= 400:
+                error_message = f"HTTP Error {resp.status_code}: {resp.reason_phrase}"
+                print(error_message)
+                raise APIClientError(error_message, resp.status_code)
+            parser = api_client.JSONArrayParser()
+            async for chunk in resp.aiter_bytes():
+                for item in parser.feed(chunk):
+                    yield item
+            for item in parser.feed(b"", final=True):
+                yield item
+    except (httpx.HTTPError, ValueError) as e:
+        error_message = f"An unexpected error occurred: {e}"
+        print(error_message)
+        raise APIClientError(error_message) from e
+
+
+async def stream_events(params: Dict[str, str]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yields (event, data) from the server's `/events` stream until it ends.
+
+    The first event is `ready`. Raises APIClientError if the stream can't be
+    opened or breaks; a quiet stream still gets keep-alives well within the
+    read timeout.
+    """
+    timeout = httpx.Timeout(_options["timeout"], read=EVENTS_READ_TIMEOUT)
+    try:
+        async with _get_client().stream(
+            "GET", f"{api_client.SERVER_BASE}/events", params=params, headers=api_client.session_headers(), timeout=timeout
+        ) as resp:
+            if resp.status_code >= 400:
+                error_message = f"HTTP Error {resp.status_code}: {resp.reason_phrase}"
+                print(error_message)
+                raise APIClientError(error_message, resp.status_code)
+            event, data = "message", []
+            async for line in resp.aiter_lines():
+                if not line:
+                    if data:
+                        yield event, json.loads("\n".join(data))
+                    event, data = "message", []
+                elif line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    data.append(line[5:].strip())
+    except (httpx.HTTPError, ValueError) as e:
+        error_message = f"An unexpected error occurred: {e}"
+        print(error_message)
+        raise APIClientError(error_message) from e
+
+
+async def aclose():
+    """Closes the shared client of the running loop."""
+    global _client, _client_loop
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client, _client_loop = None, None
@@ -1,5 +1,7 @@
 import flet as ft
-from api_client import server_post, server_get, APIClientError
+from api_client import server_post, APIClientError
+from sync_store import get_sync_store
+from tasks import ViewTasks
 
 
 class CreateProjectOverlay(ft.Container):
@@ -8,6 +10,7 @@ class CreateProjectOverlay(ft.Container):
     def __init__(self, page: ft.Page, on_success=None):
         super().__init__()
         self.page = page
+        self.tasks = ViewTasks(page)
         self.on_success = on_success
         
         # Dropdown for selecting connection
@@ -100,16 +103,17 @@ class CreateProjectOverlay(ft.Container):
         """Show the overlay"""
         self.page.overlay.append(self)
         self.page.update()
-        # Load connections after showing
-        self._load_connections()
+        # Load connections after showing, without holding up the UI
+        self.tasks.run(self._load_connections, key="connections")
     
     def hide(self):
-        """Hide the overlay"""
+        """Hide the overlay, abandoning a connection load still in flight"""
+        self.tasks.cancel_all()
         if self in self.page.overlay:
             self.page.overlay.remove(self)
             self.page.update()
     
-    def _load_connections(self):
+    async def _load_connections(self):
         """Load accepted connections"""
         # Check if logged in
         if not hasattr(self.page, 'session_username') or not self.page.session_username:
@@ -122,7 +126,9 @@ class CreateProjectOverlay(ft.Container):
         
         try:
             username = self.page.session_username
-            connections = server_get(f"/requests?user={username}")
+            store = get_sync_store(username)
+            await store.sync_async()
+            connections = store.connections()
             
             # Filter only accepted connections
             accepted = [c for c in connections if c.get("status") == "accepted"]
@@ -1,5 +1,5 @@
 import flet as ft
-from api_client import server_post, server_get, APIClientError
+from api_client import batch, server_post, set_session_token, APIClientError
 
 from components.ThemeModeButton import ThemeModeButton
 from components.GradientText import GradientText
@@ -288,13 +288,16 @@ class LoginOverlay(ft.Container):
 
         # 2. Server-side validation and login
         try:
-            server_get("/health")
+            # Health check and login share one round trip
+            with batch(stop_on_error=True) as calls:
+                health = calls.get("/health")
+                login = calls.post("/login", {"username": username, "password": password})
+            health.result()
             print("Server is online. Attempting to log in...")
 
-            user_data = server_post(
-                "/login", {"username": username, "password": password}
-            )
+            user_data = login.result()
             self.page.session_username = user_data.get("username")
+            set_session_token(user_data.get("token"))
             print(f"Login successful for user: {user_data.get('username')}")
             self.hide()
 
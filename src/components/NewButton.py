@@ -146,6 +146,10 @@ class NewButton(ft.Container):
     def _on_action_success(self):
         """Generic success handler for dialogs"""
         print("Action success callback called")  # Debug
+        # New connections and projects change what the cached views show
+        router = getattr(self.page, "router", None)
+        if router:
+            router.invalidate("home", "connections")
         self.page.snack_bar = ft.SnackBar(
             content=ft.Text("Action completed successfully!"),
             bgcolor=ft.Colors.GREEN,
@@ -11,10 +11,12 @@ class OverviewCard(ft.Container):
         connection_data: dict = {},
         on_open=None,
         width: int = 350,
+        on_hover=None,
     ):
         super().__init__()
         self.page = page
         self.on_open_handler = on_open
+        self.on_hover = on_hover
         self.width = width
 
         # Image at the top - fills full width
@@ -28,21 +30,28 @@ class OverviewCard(ft.Container):
         )
 
         # Title, subtitle and link section
+        self.title_text = ft.Text(
+            title,
+            size=20,
+            weight=ft.FontWeight.BOLD,
+            color=ft.Colors.ON_SURFACE,  # Semantic color
+        )
+        self.subtitle_text = ft.Text(
+            subtitle,
+            size=14,
+            opacity=0.7,
+            color=ft.Colors.ON_SURFACE,  # Semantic color
+        )
+        self.role_text = ft.Text(
+            connection_data.get("role", ""),
+            size=12,
+            color=ft.Colors.ON_SURFACE,
+        )
         text_section = ft.Container(
             content=ft.Column(
                 [
-                    ft.Text(
-                        title,
-                        size=20,
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.Colors.ON_SURFACE,  # Semantic color
-                    ),
-                    ft.Text(
-                        subtitle,
-                        size=14,
-                        opacity=0.7,
-                        color=ft.Colors.ON_SURFACE,  # Semantic color
-                    ),
+                    self.title_text,
+                    self.subtitle_text,
                     ft.Row(
                         [
                             ft.Container(
@@ -57,11 +66,7 @@ class OverviewCard(ft.Container):
                                 ),
                             ),
                             ft.Text("•", color=ft.Colors.ON_SURFACE),
-                            ft.Text(
-                                connection_data.get("role", ""), 
-                                size=12,
-                                color=ft.Colors.ON_SURFACE,
-                            ),
+                            self.role_text,
                         ], 
                         spacing=15
                     ),
@@ -114,6 +119,12 @@ class OverviewCard(ft.Container):
         self.animate_scale = ft.Animation(200, ft.AnimationCurve.EASE)
         self.scale = 1.0
 
+    def set_text(self, title: str, subtitle: str, role: str):
+        """Change the card's text in place (no rebuild)"""
+        self.title_text.value = title
+        self.subtitle_text.value = subtitle
+        self.role_text.value = role
+
     def _handle_open(self, e):
         """Handle open button click"""
         if self.on_open_handler:
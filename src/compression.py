@@ -0,0 +1,121 @@
+# Response compression for the server. A response is compressed when the
+# client accepts it and the body is big enough to be worth it: with brotli
+# if the optional `brotli` package is installed and the client asks for
+# "br", with gzip otherwise. Streaming responses are compressed chunk by
+# chunk and flushed after each one, so they still arrive incrementally.
+# Event streams are left alone, since a compressor would hold events back.
+import asyncio
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024
+# Bigger bodies are compressed on a worker thread instead of the event loop
+COMPRESS_THREAD_MIN_BYTES = 256 * 1024
+GZIP_LEVEL = 4
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/plain", "text/html")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """The best encoding the client accepts ("br" or "gzip"), or None."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class Compressor:
+    """Incremental compressor for one response body."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compresses `data` and flushes, so the client can decode everything sent so far."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """Compresses JSON/text responses of at least `minimum_size` bytes."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", "")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: List[Message] = []
+        compressor: Optional[Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal compressor, passthrough
+            if message["type"] == "http.response.start":
+                start.append(message)
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                # First body chunk: decide now that the size of a single-chunk body is known
+                headers = MutableHeaders(raw=list(start[0]["headers"]))
+                start[0]["headers"] = headers.raw
+                content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+                if (
+                    "content-encoding" in headers
+                    or content_type not in COMPRESSIBLE_TYPES
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start[0])
+                    await send(message)
+                    return
+                compressor = Compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    if len(body) >= COMPRESS_THREAD_MIN_BYTES:
+                        body = await asyncio.to_thread(compressor.compress, body, True)
+                    else:
+                        body = compressor.compress(body, True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start[0])
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["Content-Length"]
+                await send(start[0])
+            await send({"type": "http.response.body", "body": compressor.compress(body, not more_body), "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
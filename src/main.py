@@ -1,5 +1,6 @@
 import flet as ft
 import json, os
+from collections import OrderedDict
 import urllib.request
 import urllib.error
 
@@ -10,14 +11,29 @@ from views.HomeView import HomeView
 from views.ConnectionsView import ConnectionsView
 
 from api_client import server_post
+from prefetch import get_prefetcher
+from sync_store import get_sync_store
+
+# Views kept mounted (hidden) after the user leaves them
+VIEW_CACHE_SIZE = 3
+
 
 class ContentRouter:
-    """Manages content switching based on navigation"""
+    """Manages content switching based on navigation.
+
+    Visited views stay mounted but hidden, so going back to one is a
+    visibility toggle instead of a rebuild and refetch. Mounted views stay
+    subscribed to the user's SyncStore, which tells every subscriber about
+    every pushed change, so hidden views stay current. At most `cache_size` views are kept; the
+    least recently shown one is unmounted first. Call `invalidate` when a
+    view's data changed in a way it can't see (e.g. after creating a project).
+    """
 
-    def __init__(self, page: ft.Page):
+    def __init__(self, page: ft.Page, cache_size: int = VIEW_CACHE_SIZE):
         self.page = page
         self.current_view = None
         self.current_route = "home"
+        self.cache_size = cache_size
 
         # Map route names to view classes
         self.routes = {
@@ -25,37 +41,61 @@ class ContentRouter:
             "connections": ConnectionsView,
         }
 
-        # Container that holds the current view
+        # Mounted views by route, least recently shown first
+        self.views: "OrderedDict[str, ft.Control]" = OrderedDict()
+        self.view_stack = ft.Column([], spacing=0, expand=True)
+
+        # Container that holds the views
         self.content_container = ft.Container(
+            content=self.view_stack,
             expand=True,
             bgcolor=ft.Colors.SURFACE,  # Use semantic color
             padding=20,
         )
 
     def navigate(self, route_name: str):
-        """Switch to a different view"""
+        """Switch to a different view, reusing it if it is still mounted"""
         print(f"Router navigate called with: {route_name}")
 
-        if route_name in self.routes:
-            self.current_route = route_name
-            view_class = self.routes[route_name]
-            self.current_view = view_class(self.page)
-            print(f"Created view: {self.current_view}")
-
-            self.content_container.content = self.current_view
-
-            if self.content_container.page:
-                print("Updating container")
-                self.content_container.update()
-            else:
-                print("Container not on page yet")
-        else:
+        if route_name not in self.routes:
             print(f"Route '{route_name}' not found in routes")
+            return
+
+        self.current_route = route_name
+        view = self.views.get(route_name)
+        if view is None:
+            view = self.routes[route_name](self.page)
+            print(f"Created view: {view}")
+            self.views[route_name] = view
+            self.view_stack.controls.append(view)
+            while len(self.views) > self.cache_size:
+                _, evicted = self.views.popitem(last=False)
+                self.view_stack.controls.remove(evicted)
+        self.views.move_to_end(route_name)
+
+        for cached in self.views.values():
+            cached.visible = cached is view
+        self.current_view = view
+
+        if self.content_container.page:
+            self.view_stack.update()
+        else:
+            print("Container not on page yet")
+
+    def invalidate(self, *route_names: str):
+        """Drop cached views (all if none are named); the current one is rebuilt right away"""
+        for route_name in route_names or list(self.views):
+            view = self.views.pop(route_name, None)
+            if view is not None:
+                self.view_stack.controls.remove(view)
+        if self.current_route not in self.views:
+            self.navigate(self.current_route)
+        elif self.content_container.page:
+            self.view_stack.update()
     
     def reload_current_view(self):
-        """Reload the current view - useful after login"""
-        if self.current_route:
-            self.navigate(self.current_route)
+        """Rebuild the views from scratch - useful after login, when the user changed"""
+        self.invalidate()
 
     def get_container(self):
         """Returns the content container"""
@@ -121,8 +161,10 @@ def main(page: ft.Page):
     page.spacing = 0
     page.window.icon = "icon.ico"
 
-    # Create router
+    # Create router; components reach it as page.router to invalidate views
     router = ContentRouter(page)
+    page.router = router
+    prefetcher = get_prefetcher(page)
 
     # Create sidebar with navigation callback
     sidebar = SideBar(page, on_navigate=router.navigate)
@@ -163,7 +205,12 @@ def main(page: ft.Page):
     def on_login_success():
         """Called after successful login"""
         print("Login successful, reloading views...")
+        prefetcher.cancel()  # anything queued belonged to the previous session
         router.reload_current_view()
+        # Warm connections and projects (one /sync) for whichever tab comes next;
+        # the home view's own load shares this request
+        store = get_sync_store(page.session_username)
+        prefetcher.schedule("sync", store.sync_async)
     
     show_login_overlay(page, on_success=on_login_success)
 
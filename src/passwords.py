@@ -0,0 +1,125 @@
+# Password hashing for the server. Hashes are salted per user and made with
+# a deliberately slow KDF (scrypt by default, or PBKDF2-SHA256), so they run
+# on a small dedicated thread pool: hashlib releases the GIL while it works,
+# so a burst of logins keeps at most `max_workers` cores busy and the event
+# loop and the storage threads stay free for other requests.
+#
+# Stored format: "<scheme>$<params>$<salt>$<hash>" (salt and hash in
+# unpadded base64), e.g. "scrypt$16384,8,1$...$...". Hashes from before this
+# format (SHA-256 with one global salt, 64 hex digits) still verify and are
+# replaced on the user's next successful login.
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+LEGACY_SALT = "flashgig_salt_2024"
+
+SCRYPT_N = 2 ** 14  # 16 MiB of memory per hash with r=8
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600_000
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+class HasherBusy(Exception):
+    """Too many hashes are already waiting for the pool."""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _legacy_hash(password: str) -> str:
+    return hashlib.sha256(f"{LEGACY_SALT}{password}".encode()).hexdigest()
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords with `scheme` ("scrypt" or "pbkdf2_sha256").
+
+    The blocking `hash`/`verify` do the work on the calling thread; the
+    `*_async` variants run it on the hasher's pool. At most `max_pending`
+    async calls may wait for a worker at once; beyond that they raise
+    HasherBusy instead of queueing without bound.
+    """
+
+    def __init__(
+        self,
+        scheme: str = "scrypt",
+        max_workers: int = 2,
+        max_pending: int = 64,
+        scrypt_n: int = SCRYPT_N,
+        pbkdf2_iterations: int = PBKDF2_ITERATIONS,
+    ):
+        if scheme not in ("scrypt", "pbkdf2_sha256"):
+            raise ValueError(f"Unknown password hashing scheme: {scheme}")
+        self.scheme = scheme
+        self.params = f"{scrypt_n},{SCRYPT_R},{SCRYPT_P}" if scheme == "scrypt" else str(pbkdf2_iterations)
+        self.max_pending = max_pending
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+
+    @staticmethod
+    def _derive(scheme: str, params: str, password: str, salt: bytes) -> bytes:
+        if scheme == "scrypt":
+            n, r, p = (int(v) for v in params.split(","))
+            return hashlib.scrypt(
+                password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=HASH_BYTES
+            )
+        if scheme == "pbkdf2_sha256":
+            return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, int(params), dklen=HASH_BYTES)
+        raise ValueError(f"Unknown password hashing scheme: {scheme}")
+
+    def hash(self, password: str) -> str:
+        """A new hash of `password` with a fresh random salt."""
+        salt = os.urandom(SALT_BYTES)
+        derived = self._derive(self.scheme, self.params, password, salt)
+        return f"{self.scheme}${self.params}${_b64encode(salt)}${_b64encode(derived)}"
+
+    def verify(self, password: str, stored: str) -> bool:
+        """Whether `password` matches `stored`, in any supported or legacy format."""
+        parts = stored.split("$")
+        if len(parts) == 1:
+            return hmac.compare_digest(_legacy_hash(password), stored)
+        if len(parts) != 4:
+            return False
+        scheme, params, salt, expected = parts
+        try:
+            derived = self._derive(scheme, params, password, _b64decode(salt))
+            expected_bytes = _b64decode(expected)
+        except ValueError:  # includes binascii.Error from a malformed salt or hash
+            return False
+        return hmac.compare_digest(derived, expected_bytes)
+
+    def needs_rehash(self, stored: str) -> bool:
+        """Whether `stored` was made with another scheme or other parameters than the current ones."""
+        return not stored.startswith(f"{self.scheme}${self.params}$")
+
+    def verify_and_update(self, password: str, stored: str) -> Tuple[bool, Optional[str]]:
+        """Verifies `password`; on success with an outdated hash also returns a replacement."""
+        if not self.verify(password, stored):
+            return False, None
+        return True, self.hash(password) if self.needs_rehash(stored) else None
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.max_pending:
+            raise HasherBusy()
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run(self.hash, password)
+
+    async def verify_and_update_async(self, password: str, stored: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(self.verify_and_update, password, stored)
@@ -0,0 +1,65 @@
+# Background warm-up of data the user is likely to need next.
+# Prefetches run on the page's event loop, a few at a time, and are
+# best-effort: failures are ignored, and callers cancel the ones that stopped
+# being relevant (e.g. when the pointer leaves a card before it fired).
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Optional
+
+import flet as ft
+
+from api_client import APIClientError
+
+PREFETCH_CONCURRENCY = 2
+
+
+class Prefetcher:
+    """Schedules prefetches by key; a key already pending or running isn't scheduled twice."""
+
+    def __init__(self, page: ft.Page, max_concurrent: int = PREFETCH_CONCURRENCY):
+        self.page = page
+        self._limit = asyncio.Semaphore(max_concurrent)
+        self._lock = threading.Lock()  # handlers may call in from Flet's worker threads
+        self._tasks: Dict[str, Future] = {}
+
+    def schedule(self, key: str, fetch: Callable[[], Awaitable], delay: float = 0):
+        """Runs `fetch()` in the background after `delay` seconds, unless cancelled first."""
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is not None and not task.done():
+                return
+            task = self._tasks[key] = self.page.run_task(self._run, key, fetch, delay)
+        task.add_done_callback(lambda done: self._forget(key, done))
+
+    def _forget(self, key: str, task: Future):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+    async def _run(self, key: str, fetch: Callable[[], Awaitable], delay: float):
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            async with self._limit:
+                await fetch()
+        except APIClientError as ex:
+            print(f"Prefetch {key} failed: {ex}")
+
+    def cancel(self, key: Optional[str] = None, prefix: Optional[str] = None):
+        """Cancels one prefetch, every one whose key starts with `prefix`, or all of them."""
+        with self._lock:
+            names = [
+                name for name in self._tasks
+                if (key is None and prefix is None) or name == key or (prefix and name.startswith(prefix))
+            ]
+            tasks = [self._tasks.pop(name) for name in names]
+        for task in tasks:
+            task.cancel()
+
+
+def get_prefetcher(page: ft.Page) -> Prefetcher:
+    """The page's prefetcher, created on first use."""
+    if getattr(page, "prefetcher", None) is None:
+        page.prefetcher = Prefetcher(page)
+    return page.prefetcher
@@ -0,0 +1,38 @@
+# Keyed list reconciliation for views that re-render lists of records.
+# Rebuilding every card on each load makes Flet send the whole list again;
+# reusing the controls of unchanged records (matched by record "id") means
+# an update only carries the cards that were added, removed or changed.
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import flet as ft
+
+
+def reconcile(
+    controls: List[ft.Control],
+    records: Iterable[Dict[str, Any]],
+    create: Callable[[Dict[str, Any]], ft.Control],
+    patch: Optional[Callable[[ft.Control, Dict[str, Any]], None]] = None,
+) -> List[ft.Control]:
+    """Returns controls for `records`, in order, reusing the ones in `controls`.
+
+    Each control remembers the record it shows in `control.data`. A record
+    whose control exists and is unchanged keeps it untouched; a changed one
+    is handed to `patch(control, record)` to update the control in place
+    (or, without `patch`, gets a fresh control from `create`). New records
+    get `create(record)`. Controls without a record (placeholders such as
+    "Loading...") are dropped.
+    """
+    existing = {c.data["id"]: c for c in controls if isinstance(c.data, dict) and "id" in c.data}
+    result = []
+    for record in records:
+        control = existing.get(record["id"])
+        if control is None:
+            control = create(record)
+        elif control.data != record:
+            if patch is None:
+                control = create(record)
+            else:
+                patch(control, record)
+        control.data = record
+        result.append(control)
+    return result
@@ -1,63 +1,223 @@
-from fastapi import FastAPI, HTTPException, Query, Request
-from typing import List, Dict, Any, Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
-import os
+import asyncio
+import base64
+import heapq
 import json
+import os
 import uuid
-import hashlib
+
+from .compression import COMPRESS_MIN_BYTES, CompressionMiddleware
+from .passwords import HasherBusy, PasswordHasher
+from .sessions import SESSION_TTL, SessionSigner, load_secret
+from .storage import AsyncStorage, create_storage, encode_json
 
 
-# ---------- Storage paths ----------
+# ---------- Storage ----------
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-DATA_DIR = os.path.join(PROJECT_ROOT, "storage")
-USERS_FILE = os.path.join(DATA_DIR, "users.json")
-REQUESTS_FILE = os.path.join(DATA_DIR, "requests.json")
-PROJECTS_FILE = os.path.join(DATA_DIR, "projects.json")
-COMMENTS_FILE = os.path.join(DATA_DIR, "comments.json")
+DATA_DIR = os.environ.get("FLASHGIG_DATA_DIR") or os.path.join(PROJECT_ROOT, "storage")
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# ---------- Password Hashing ----------
-def get_password_hash(password: str) -> str:
-    """Hashes a password for storage using SHA-256 with salt."""
-    salt = "flashgig_salt_2024"
-    return hashlib.sha256(f"{salt}{password}".encode()).hexdigest()
+# JSON files by default; set FLASHGIG_STORAGE=sqlite for the indexed SQLite backend
+storage = create_storage(DATA_DIR)
+# `async def` endpoints must go through this so file I/O stays off the event loop
+async_storage = AsyncStorage(storage, max_workers=int(os.environ.get("FLASHGIG_IO_THREADS", "8")))
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifies a plain password against a hashed one."""
-    return get_password_hash(plain_password) == hashed_password
+# ---------- Password Hashing ----------
+# Per-user salted scrypt (or FLASHGIG_PASSWORD_SCHEME=pbkdf2_sha256) on its own
+# small pool, so slow hashes never run on the event loop or the storage threads
+password_hasher = PasswordHasher(
+    scheme=os.environ.get("FLASHGIG_PASSWORD_SCHEME", "scrypt"),
+    max_workers=int(os.environ.get("FLASHGIG_HASH_THREADS", "2")),
+)
+
+def hasher_busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Server busy, try again", headers={"Retry-After": "1"})
+
+# ---------- Sessions ----------
+# /login returns a signed token, which clients send back as
+# "Authorization: Bearer <token>". A request that carries one may only act
+# as the user it was issued to, and that user's existence comes from the
+# token rather than a storage lookup. Requests without one work as before.
+sessions = SessionSigner(load_secret(DATA_DIR), ttl=int(os.environ.get("FLASHGIG_SESSION_TTL", SESSION_TTL)))
+
+def session_user(request: Request) -> Optional[Dict[str, Any]]:
+    """The caller ({"id", "username"}) per the session token; None without one, 401 if it's bad."""
+    authorization = request.headers.get("authorization")
+    if authorization is None:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    caller = sessions.verify(token.strip()) if scheme.lower() == "bearer" else None
+    if caller is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired session", headers={"WWW-Authenticate": "Bearer"})
+    return caller
+
+def session_vouches_for(request: Request, username: str) -> bool:
+    """Whether the request's session belongs to `username`; 403 if it belongs to someone else."""
+    caller = session_user(request)
+    if caller is None:
+        return False
+    if caller["username"] != username:
+        raise HTTPException(status_code=403, detail="Not allowed to act as another user")
+    return True
 
 # ---------- Helpers ----------
-def load_json(path: str, default):
-    try:
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return default
-
-def save_json(path: str, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
 def now_iso() -> str:
     return datetime.utcnow().isoformat()
 
 def get_user_or_404(username: str) -> Dict[str, Any]:
-    users: List[Dict[str, Any]] = load_json(USERS_FILE, [])
-    for u in users:
-        if u.get("username") == username:
-            return u
-    raise HTTPException(status_code=404, detail="User not found")
+    user = storage.find_one("users", username=username)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+async def fetch_user_or_404(username: str) -> Dict[str, Any]:
+    """`get_user_or_404` for async endpoints."""
+    user = await async_storage.find_one("users", username=username)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+def check_user(request: Request, username: str):
+    """Ensures `username` exists (and, with a session, is the caller)."""
+    if not session_vouches_for(request, username):
+        get_user_or_404(username)
+
+async def check_user_async(request: Request, username: str):
+    """`check_user` for async endpoints."""
+    if not session_vouches_for(request, username):
+        await fetch_user_or_404(username)
+
+# ---------- Pagination ----------
+# List endpoints return everything by default; with ?limit=N they return
+# {"items": [...], "next_cursor": ..., "version": ...} pages, newest first by
+# (created_at, id). "version" is where a client can pick up with /sync.
+PAGE_LIMIT_MAX = 200
+
+def page_key(record: Dict[str, Any]) -> Tuple[str, str]:
+    return (record.get("created_at") or "", record.get("id") or "")
+
+def encode_cursor(record: Dict[str, Any]) -> str:
+    raw = json.dumps(page_key(record)).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, record_id = json.loads(raw)
+        return (str(created_at), str(record_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate(records: List[Dict[str, Any]], limit: Optional[int], cursor: Optional[str], version: int):
+    """Applies ?limit/?cursor to a list endpoint's records, read at `version`."""
+    if limit is None:
+        return records
+    if cursor:
+        before = decode_cursor(cursor)
+        records = [r for r in records if page_key(r) < before]
+    # One extra record tells us whether there is another page
+    page = heapq.nlargest(limit + 1, records, key=page_key)
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return {"items": page[:limit], "next_cursor": next_cursor, "version": version}
+
+PageLimit = Query(None, ge=1, le=PAGE_LIMIT_MAX, description="Page size; enables paging")
+PageCursor = Query(None, description="next_cursor of the previous page")
+
+# ---------- Conditional GET ----------
+# Read endpoints tag responses with an ETag made of storage versions, which
+# every write bumps, so the tag is known before any records are read. If the
+# client's If-None-Match still matches, it gets an empty 304 and the records
+# are never loaded or serialized.
+def make_etag(*versions: int) -> str:
+    return '"' + ".".join(str(v) for v in versions) + '"'
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Tags the response; returns a 304 to send instead if the client's copy is current."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    tags = {tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip() for tag in if_none_match.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+# ---------- Live Events ----------
+# Write endpoints publish the records they create or change to topics
+# ("user:<username>", "project:<id>"); /events streams them to subscribers
+# as server-sent events. Everything runs on the event loop, so no locking.
+EVENT_QUEUE_SIZE = 100
+EVENT_KEEPALIVE_SECONDS = 15
+
+class Subscription:
+    def __init__(self, topics: List[str]):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+class EventHub:
+    """Fans events out to subscriptions by topic."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, set] = {}
+
+    def subscribe(self, topics: List[str]) -> Subscription:
+        subscription = Subscription(topics)
+        for topic in topics:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for topic in subscription.topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def publish(self, topics: List[str], event: str, data: Dict[str, Any]):
+        """Queues an event for everyone subscribed to any of `topics` (once each)."""
+        subscriptions = set()
+        for topic in topics:
+            subscriptions |= self._subscribers.get(topic, set())
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # Too far behind: end its stream; the client re-syncs when it reconnects
+                self.unsubscribe(subscription)
+                subscription.queue.get_nowait()
+                subscription.queue.put_nowait(None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"topics": len(self._subscribers), "subscriptions": sum(len(s) for s in self._subscribers.values())}
+
+events_hub = EventHub()
+
+def publish_request(item: Dict[str, Any]):
+    events_hub.publish([f"user:{item['from_username']}", f"user:{item['to_username']}"], "request", item)
 
 # ---------- App ----------
 app = FastAPI(title="FlashGig Local Server", version="0.1.2")
+# Endpoints keep their return annotations: FastAPI then serializes straight to
+# JSON bytes in pydantic-core, which beats re-encoding through a response class
+app.add_middleware(
+    CompressionMiddleware, minimum_size=int(os.environ.get("FLASHGIG_COMPRESS_MIN_BYTES", COMPRESS_MIN_BYTES))
+)
 
 # ---------- User Endpoints ----------
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/metrics")
+def metrics() -> Dict[str, Any]:
+    """Storage counters, e.g. the JSON backend's cache hit ratio."""
+    return {"storage": storage.stats(), "events": events_hub.stats(), "sessions": sessions.stats()}
+
 @app.post("/register", status_code=201)
 async def register_user(request: Request) -> Dict[str, Any]:
     """Registers a new user."""
@@ -75,26 +235,23 @@ async def register_user(request: Request) -> Dict[str, Any]:
         if len(password) < 6:
             raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
 
-        users: List[Dict[str, Any]] = load_json(USERS_FILE, [])
-
-        for u in users:
-            if u.get("username") == username:
-                raise HTTPException(status_code=400, detail="Username already registered")
-
         user = {
             "id": str(uuid.uuid4()),
             "username": username,
-            "hashed_password": get_password_hash(password),
+            "hashed_password": await password_hasher.hash_async(password),
             "created_at": now_iso(),
         }
-        users.append(user)
-        save_json(USERS_FILE, users)
-        
+        # Checked and inserted atomically so two concurrent signups can't both win
+        if not await async_storage.insert_unique("users", user, "username"):
+            raise HTTPException(status_code=400, detail="Username already registered")
+
         print(f"✓ User '{username}' registered successfully")
         return {"id": user["id"], "username": user["username"], "created_at": user["created_at"]}
     
     except HTTPException:
         raise
+    except HasherBusy:
+        raise hasher_busy()
     except Exception as e:
         print(f"✗ Registration error: {e}")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
@@ -110,26 +267,38 @@ async def login_user(request: Request) -> Dict[str, Any]:
         if not username or not password:
             raise HTTPException(status_code=400, detail="Username and password are required")
 
-        user = get_user_or_404(username)
+        user = await fetch_user_or_404(username)
         
-        if not verify_password(password, user.get("hashed_password", "")):
+        ok, new_hash = await password_hasher.verify_and_update_async(password, user.get("hashed_password", ""))
+        if not ok:
             raise HTTPException(status_code=401, detail="Incorrect username or password")
+        if new_hash is not None:
+            # Stored with an older scheme or weaker parameters: upgrade it now that we know the password
+            user = await async_storage.update("users", user["id"], {"hashed_password": new_hash}) or user
         
         print(f"✓ User '{username}' logged in successfully")
         
         user_response = user.copy()
         user_response.pop("hashed_password", None)
+        session = sessions.issue(user)
+        user_response["token"] = session["token"]
+        user_response["token_expires_at"] = session["expires_at"]
         return user_response
     
     except HTTPException:
         raise
+    except HasherBusy:
+        raise hasher_busy()
     except Exception as e:
         print(f"✗ Login error: {e}")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
 @app.get("/users/{username}")
-def get_user(username: str) -> Dict[str, Any]:
+def get_user(username: str, request: Request, response: Response) -> Dict[str, Any]:
     user = get_user_or_404(username)
+    cached = not_modified(request, response, make_etag(user.get("version", 0)))
+    if cached is not None:
+        return cached
     user_response = user.copy()
     user_response.pop("hashed_password", None)
     return user_response
@@ -145,10 +314,8 @@ async def create_request(request: Request) -> Dict[str, Any]:
     if not from_username or not to_username or not project_name:
         raise HTTPException(status_code=400, detail="from_username, to_username and project_name are required")
 
-    _ = get_user_or_404(from_username)
-    _ = get_user_or_404(to_username)
-
-    items: List[Dict[str, Any]] = load_json(REQUESTS_FILE, [])
+    await check_user_async(request, from_username)
+    _ = await fetch_user_or_404(to_username)
 
     item = {
         "id": str(uuid.uuid4()),
@@ -158,32 +325,46 @@ async def create_request(request: Request) -> Dict[str, Any]:
         "status": "requested",
         "created_at": now_iso(),
     }
-    items.insert(0, item)
-    save_json(REQUESTS_FILE, items)
+    await async_storage.insert("requests", item)
+    publish_request(item)
     return item
 
 @app.get("/requests")
-def list_requests(user: str = Query(..., description="Filter by username")) -> List[Dict[str, Any]]:
-    _ = get_user_or_404(user)
-    items: List[Dict[str, Any]] = load_json(REQUESTS_FILE, [])
-    return [r for r in items if r.get("from_username") == user or r.get("to_username") == user]
+def list_requests(
+    request: Request,
+    response: Response,
+    user: str = Query(..., description="Filter by username"),
+    limit: Optional[int] = PageLimit,
+    cursor: Optional[str] = PageCursor,
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    check_user(request, user)
+    cached = not_modified(request, response, make_etag(storage.collection_version("requests")))
+    if cached is not None:
+        return cached
+    version = storage.version()
+    return paginate(storage.find_any("requests", ("from_username", "to_username"), user), limit, cursor, version)
 
 @app.patch("/requests/{req_id}")
 async def update_request(req_id: str, request: Request) -> Dict[str, Any]:
     data = await request.json()
     status = data.get("status")
 
-    items: List[Dict[str, Any]] = load_json(REQUESTS_FILE, [])
-    for i, r in enumerate(items):
-        if r.get("id") == req_id:
-            if status is not None:
-                if status not in ("requested", "accepted"):
-                    raise HTTPException(status_code=400, detail="Invalid status")
-                r["status"] = status
-            items[i] = r
-            save_json(REQUESTS_FILE, items)
-            return r
-    raise HTTPException(status_code=404, detail="Request not found")
+    fields = {}
+    if status is not None:
+        if status not in ("requested", "accepted"):
+            raise HTTPException(status_code=400, detail="Invalid status")
+        fields["status"] = status
+    if not fields:
+        # Nothing to change: don't bump the version (and every ETag) or publish an event
+        r = await async_storage.get("requests", req_id)
+        if r is None:
+            raise HTTPException(status_code=404, detail="Request not found")
+        return r
+    updated = await async_storage.update("requests", req_id, fields)
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Request not found")
+    publish_request(updated)
+    return updated
 
 # ---------- Project Endpoints ----------
 @app.post("/projects", status_code=201)
@@ -198,12 +379,7 @@ async def create_project(request: Request) -> Dict[str, Any]:
         raise HTTPException(status_code=400, detail="request_id and title are required")
     
     # Verify the request exists and is accepted
-    requests = load_json(REQUESTS_FILE, [])
-    connection = None
-    for r in requests:
-        if r.get("id") == request_id:
-            connection = r
-            break
+    connection = await async_storage.get("requests", request_id)
     
     if not connection:
         raise HTTPException(status_code=404, detail="Connection request not found")
@@ -211,8 +387,6 @@ async def create_project(request: Request) -> Dict[str, Any]:
     if connection.get("status") != "accepted":
         raise HTTPException(status_code=400, detail="Connection must be accepted first")
     
-    projects = load_json(PROJECTS_FILE, [])
-    
     project = {
         "id": str(uuid.uuid4()),
         "request_id": request_id,
@@ -222,59 +396,95 @@ async def create_project(request: Request) -> Dict[str, Any]:
         "created_at": now_iso(),
     }
     
-    projects.insert(0, project)
-    save_json(PROJECTS_FILE, projects)
+    await async_storage.insert("projects", project)
     return project
 
 @app.get("/projects")
-def list_projects(user: str = Query(..., description="Filter by user")) -> List[Dict[str, Any]]:
+def list_projects(
+    request: Request,
+    response: Response,
+    user: str = Query(..., description="Filter by user"),
+    limit: Optional[int] = PageLimit,
+    cursor: Optional[str] = PageCursor,
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """Get all projects for a user"""
-    _ = get_user_or_404(user)
+    check_user(request, user)
+    # Accepting a connection changes the list as much as editing a project does
+    etag = make_etag(storage.collection_version("requests"), storage.collection_version("projects"))
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
+    version = storage.version()
     
     # Get user's connections
-    requests = load_json(REQUESTS_FILE, [])
-    user_request_ids = [
-        r["id"] for r in requests 
-        if (r.get("from_username") == user or r.get("to_username") == user) 
-        and r.get("status") == "accepted"
-    ]
+    requests = storage.find_any("requests", ("from_username", "to_username"), user)
+    user_request_ids = {r["id"] for r in requests if r.get("status") == "accepted"}
     
     # Get projects for those connections
-    projects = load_json(PROJECTS_FILE, [])
-    user_projects = [p for p in projects if p.get("request_id") in user_request_ids]
-    
-    return user_projects
+    return paginate(storage.find_in("projects", "request_id", user_request_ids), limit, cursor, version)
 
 @app.get("/projects/{project_id}")
-def get_project(project_id: str) -> Dict[str, Any]:
+def get_project(project_id: str, request: Request, response: Response) -> Dict[str, Any]:
     """Get a specific project"""
-    projects = load_json(PROJECTS_FILE, [])
-    for p in projects:
-        if p.get("id") == project_id:
-            return p
-    raise HTTPException(status_code=404, detail="Project not found")
+    project = storage.get("projects", project_id)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    cached = not_modified(request, response, make_etag(project.get("version", 0)))
+    if cached is not None:
+        return cached
+    return project
+
+@app.get("/projects/{project_id}/workspace")
+def get_project_workspace(
+    project_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=PAGE_LIMIT_MAX, description="Size of the first comment page"),
+) -> Dict[str, Any]:
+    """The project, its connection, the participants and the newest comments in one response"""
+    version = storage.version()
+    project = storage.get("projects", project_id)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    connection = storage.get("requests", project["request_id"]) if project.get("request_id") else None
+    etag = make_etag(
+        project.get("version", 0),
+        (connection or {}).get("version", 0),
+        storage.collection_version("comments"),
+    )
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
+    
+    usernames = [connection["from_username"], connection["to_username"]] if connection else []
+    participants = [
+        {k: v for k, v in user.items() if k != "hashed_password"}
+        for user in storage.find_in("users", "username", usernames)
+    ]
+    return {
+        "project": project,
+        "connection": connection,
+        "participants": participants,
+        "comments": paginate(storage.find("comments", project_id=project_id), limit, None, version),
+    }
 
 @app.patch("/projects/{project_id}")
 async def update_project(project_id: str, request: Request) -> Dict[str, Any]:
     """Update project status or details"""
     data = await request.json()
     
-    projects = load_json(PROJECTS_FILE, [])
-    for i, p in enumerate(projects):
-        if p.get("id") == project_id:
-            # Update fields
-            if "status" in data:
-                p["status"] = data["status"]
-            if "title" in data:
-                p["title"] = data["title"]
-            if "description" in data:
-                p["description"] = data["description"]
-            
-            projects[i] = p
-            save_json(PROJECTS_FILE, projects)
-            return p
-    
-    raise HTTPException(status_code=404, detail="Project not found")
+    # Update fields
+    fields = {k: data[k] for k in ("status", "title", "description") if k in data}
+    if not fields:
+        # Nothing to change: don't bump the version (and every ETag) or rewrite the file
+        project = await async_storage.get("projects", project_id)
+        if project is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return project
+    project = await async_storage.update("projects", project_id, fields)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
 
 # ---------- Comment Endpoints ----------
 @app.post("/comments", status_code=201)
@@ -289,9 +499,7 @@ async def create_comment(request: Request) -> Dict[str, Any]:
     if not project_id or not username or not text:
         raise HTTPException(status_code=400, detail="project_id, username, and text are required")
     
-    _ = get_user_or_404(username)
-    
-    comments = load_json(COMMENTS_FILE, [])
+    await check_user_async(request, username)
     
     comment = {
         "id": str(uuid.uuid4()),
@@ -302,15 +510,266 @@ async def create_comment(request: Request) -> Dict[str, Any]:
         "created_at": now_iso(),
     }
     
-    comments.insert(0, comment)
-    save_json(COMMENTS_FILE, comments)
+    await async_storage.insert("comments", comment)
+    events_hub.publish([f"project:{project_id}"], "comment", comment)
     return comment
 
 @app.get("/comments")
-def list_comments(project_id: str = Query(..., description="Project ID")) -> List[Dict[str, Any]]:
+def list_comments(
+    request: Request,
+    response: Response,
+    project_id: str = Query(..., description="Project ID"),
+    limit: Optional[int] = PageLimit,
+    cursor: Optional[str] = PageCursor,
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """Get all comments for a project"""
-    comments = load_json(COMMENTS_FILE, [])
-    return [c for c in comments if c.get("project_id") == project_id]
+    cached = not_modified(request, response, make_etag(storage.collection_version("comments")))
+    if cached is not None:
+        return cached
+    version = storage.version()
+    return paginate(storage.find("comments", project_id=project_id), limit, cursor, version)
+
+# ---------- Sync Endpoint ----------
+@app.get("/sync")
+def sync(
+    request: Request,
+    response: Response,
+    user: str = Query(..., description="Username"),
+    since: int = Query(0, ge=0, description="Version from the previous sync; 0 for everything"),
+    project_id: Optional[str] = Query(None, description="Also sync this project's comments"),
+) -> Dict[str, Any]:
+    """Requests, projects (and optionally comments) changed since a version.
+
+    Pass the returned "version" as `since` next time. Records may repeat
+    across syncs; clients keep whichever copy has the higher version.
+    """
+    check_user(request, user)
+    # Read first: anything written after this shows up again next time rather than never
+    version = storage.version()
+    cached = not_modified(request, response, make_etag(version))
+    if cached is not None:
+        return cached
+
+    user_requests = storage.find_any("requests", ("from_username", "to_username"), user)
+    accepted_ids = {r["id"] for r in user_requests if r.get("status") == "accepted"}
+
+    if since:
+        requests = [
+            r for r in storage.find_changed("requests", since)
+            if user in (r.get("from_username"), r.get("to_username"))
+        ]
+        projects = [p for p in storage.find_changed("projects", since) if p.get("request_id") in accepted_ids]
+        # A newly accepted connection brings its older projects into view
+        newly_accepted = {r["id"] for r in requests if r["id"] in accepted_ids}
+        seen = {p["id"] for p in projects}
+        projects += [
+            p for p in storage.find_in("projects", "request_id", newly_accepted)
+            if p["id"] not in seen
+        ]
+    else:
+        requests = user_requests
+        projects = storage.find_in("projects", "request_id", accepted_ids)
+
+    body = {"version": version, "requests": requests, "projects": projects}
+    if project_id is not None:
+        if since:
+            body["comments"] = [
+                c for c in storage.find_changed("comments", since) if c.get("project_id") == project_id
+            ]
+        else:
+            body["comments"] = storage.find("comments", project_id=project_id)
+    return body
+
+# ---------- Events Endpoint ----------
+@app.get("/events")
+async def events(
+    request: Request,
+    user: Optional[str] = Query(None, description="Stream this user's connection requests"),
+    project_id: Optional[str] = Query(None, description="Stream this project's new comments"),
+):
+    """Server-sent events: `request` (created or updated) and `comment` (created).
+
+    The stream opens with a `ready` event; anything written before it is
+    not replayed, so clients should /sync after `ready` arrives.
+    """
+    topics = []
+    if user:
+        await check_user_async(request, user)
+        topics.append(f"user:{user}")
+    if project_id:
+        topics.append(f"project:{project_id}")
+    if not topics:
+        raise HTTPException(status_code=400, detail="user or project_id is required")
+    
+    subscription = events_hub.subscribe(topics)
+    
+    async def stream():
+        try:
+            yield "event: ready\ndata: {}\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    return
+                event, data = item
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            events_hub.unsubscribe(subscription)
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# ---------- Export Endpoints ----------
+# Whole histories as NDJSON (one record per line, oldest first). Records are
+# read from storage in batches through a cursor and sent batch by batch, so
+# server memory stays flat however large the export is.
+EXPORT_BATCH = 500
+
+def ndjson_export(collection: str, fields: Tuple[str, ...], values: List[Any]) -> StreamingResponse:
+    """Streams every record whose `fields` match one of `values`."""
+    async def stream():
+        cursor = 0
+        while cursor is not None:
+            records, cursor = await async_storage.scan(collection, fields, values, cursor, EXPORT_BATCH)
+            lines = b"".join(encode_json(r) + b"\n" for r in records)
+            if lines:
+                yield lines
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/export/comments")
+async def export_comments(project_id: str = Query(..., description="Project ID")):
+    """Every comment of a project as NDJSON"""
+    if await async_storage.get("projects", project_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return ndjson_export("comments", ("project_id",), [project_id])
+
+@app.get("/export/requests")
+async def export_requests(request: Request, user: str = Query(..., description="Username")):
+    """Every connection request a user sent or received as NDJSON"""
+    await check_user_async(request, user)
+    return ndjson_export("requests", ("from_username", "to_username"), [user])
+
+@app.get("/export/projects")
+async def export_projects(request: Request, user: str = Query(..., description="Username")):
+    """Every project of a user's accepted connections as NDJSON"""
+    await check_user_async(request, user)
+    # Only the ids of the user's accepted connections are kept in memory
+    request_ids, cursor = [], 0
+    while cursor is not None:
+        records, cursor = await async_storage.scan(
+            "requests", ("from_username", "to_username"), [user], cursor, EXPORT_BATCH
+        )
+        request_ids.extend(r["id"] for r in records if r.get("status") == "accepted")
+    return ndjson_export("projects", ("request_id",), request_ids)
+
+# ---------- Batch Endpoint ----------
+# Sub-requests are dispatched through the app itself, so they get the same
+# routing, validation and errors as if they had been sent one by one.
+BATCH_MAX = 50
+# Their responses are streams (NDJSON exports, event streams), not one JSON body
+BATCH_STREAMING_PREFIXES = ("/export/", "/events/")
+
+async def dispatch(method: str, path: str, body: Any, authorization: Optional[str] = None) -> Dict[str, Any]:
+    """Runs one sub-request in-process and returns {"status", "body"}."""
+    route, _, query = path.partition("?")
+    content = json.dumps(body).encode("utf-8") if body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": route,
+        "raw_path": route.encode("utf-8"),
+        "query_string": query.encode("utf-8"),
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(content)).encode())],
+        "client": None,
+        "server": None,
+    }
+    if authorization is not None:
+        # Sub-requests act with the batch's session
+        scope["headers"].append((b"authorization", authorization.encode("latin-1")))
+    sent = False
+    never = asyncio.Event()
+    
+    async def receive():
+        nonlocal sent
+        if sent:
+            # The caller is still connected; report no disconnect while the sub-request runs
+            await never.wait()
+        sent = True
+        return {"type": "http.request", "body": content, "more_body": False}
+    
+    status, chunks = 500, []
+    
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+    
+    try:
+        await app(scope, receive, send)
+    except Exception as e:
+        # The error middleware has answered 500 already; keep the rest of the batch going
+        print(f"✗ Batch call {method} {path} failed: {e}")
+        return {"status": 500, "body": None}
+    raw = b"".join(chunks)
+    if not raw:
+        return {"status": status, "body": None}
+    try:
+        return {"status": status, "body": json.loads(raw)}
+    except ValueError:
+        return {"status": status, "body": raw.decode("utf-8", "replace")}
+
+@app.post("/batch")
+async def batch(request: Request) -> Dict[str, Any]:
+    """Runs several API calls in one round trip.
+
+    Body: {"requests": [{"method": "GET", "path": "/health"}, ...],
+    "stop_on_error": false}. Sub-requests run in order; each answer has the
+    status and body the call would have had on its own. With stop_on_error
+    the calls after the first failing one are skipped (status null). They
+    are not a transaction: earlier writes are not rolled back.
+    """
+    data = await request.json()
+    calls = data.get("requests") if isinstance(data, dict) else None
+    if not isinstance(calls, list) or not calls:
+        raise HTTPException(status_code=400, detail="requests must be a non-empty list")
+    if len(calls) > BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX} requests per batch")
+    
+    # Validate everything first so a malformed batch runs nothing
+    parsed = []
+    for call in calls:
+        if not isinstance(call, dict):
+            raise HTTPException(status_code=400, detail="Each request must be an object")
+        method = str(call.get("method", "GET")).upper()
+        path = str(call.get("path", ""))
+        if method not in ("GET", "POST", "PATCH") or not path.startswith("/"):
+            raise HTTPException(status_code=400, detail="Each request needs a method (GET, POST, PATCH) and a path")
+        route = path.partition("?")[0].rstrip("/")
+        if route == "/batch":
+            raise HTTPException(status_code=400, detail="Batches can't be nested")
+        if (route + "/").startswith(BATCH_STREAMING_PREFIXES):
+            raise HTTPException(status_code=400, detail="Streaming endpoints can't be batched")
+        parsed.append((method, path, call.get("body")))
+    
+    responses = []
+    failed = False
+    for method, path, body in parsed:
+        if failed:
+            responses.append({"status": None, "body": None})
+            continue
+        result = await dispatch(method, path, body, request.headers.get("authorization"))
+        responses.append(result)
+        failed = bool(data.get("stop_on_error")) and result["status"] >= 400
+    return {"responses": responses}
 
 # Run with:
 #   pip install fastapi uvicorn
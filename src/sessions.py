@@ -0,0 +1,143 @@
+# Stateless session tokens for the server. /login issues a token that
+# carries the user's id and username and is signed with HMAC-SHA256, so any
+# request can be attributed to its caller by checking the signature, without
+# looking the user up in storage. Tokens that already passed the check are
+# kept in a small LRU, so a client that sends the same token on every call
+# pays for one HMAC and one JSON decode, not one per request.
+#
+# Token format: "<payload>.<signature>", both unpadded base64url, where the
+# payload is {"uid": ..., "sub": <username>, "exp": <unix time>}.
+import base64
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+SESSION_TTL = 7 * 24 * 3600
+SESSION_CACHE_SIZE = 1024
+SECRET_BYTES = 32
+SECRET_MIN_BYTES = 32
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _read_secret(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            secret = f.read()
+    except FileNotFoundError:
+        return None
+    return secret if len(secret) >= SECRET_MIN_BYTES else None
+
+
+def load_secret(data_dir: str) -> bytes:
+    """FLASHGIG_SESSION_SECRET, or a random key kept in `data_dir` so tokens survive restarts.
+
+    Raises ValueError if FLASHGIG_SESSION_SECRET is shorter than SECRET_MIN_BYTES.
+    """
+    secret = os.environ.get("FLASHGIG_SESSION_SECRET")
+    if secret:
+        if len(secret.encode("utf-8")) < SECRET_MIN_BYTES:
+            raise ValueError(f"FLASHGIG_SESSION_SECRET must be at least {SECRET_MIN_BYTES} bytes")
+        return secret.encode("utf-8")
+    path = os.path.join(data_dir, "session_secret")
+    if os.path.exists(path):
+        existing = _read_secret(path)
+        if existing is not None:
+            return existing
+        stale = True  # too short, e.g. empty after a crash in an older version
+    else:
+        stale = False
+    # Write the key to a temp file first, so no reader ever sees a partial
+    # (or empty, after a crash) key: an empty HMAC key would sign anything
+    fd, tmp_path = tempfile.mkstemp(dir=data_dir, prefix=".session_secret.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(os.urandom(SECRET_BYTES))
+            f.flush()
+            os.fsync(f.fileno())
+        if stale:
+            os.replace(tmp_path, path)
+        else:
+            try:
+                os.link(tmp_path, path)
+            except FileExistsError:
+                pass  # another worker published its key first; use theirs
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    secret_bytes = _read_secret(path)
+    if secret_bytes is None:
+        raise RuntimeError(f"Could not store a session secret in {path}")
+    return secret_bytes
+
+
+class SessionSigner:
+    """Issues and verifies session tokens signed with `secret`."""
+
+    def __init__(self, secret: bytes, ttl: int = SESSION_TTL, cache_size: int = SESSION_CACHE_SIZE):
+        if len(secret) < SECRET_MIN_BYTES:
+            raise ValueError(f"Session secrets must be at least {SECRET_MIN_BYTES} bytes")
+        self._secret = secret
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._lock = threading.Lock()  # sync endpoints verify from the threadpool
+        self._verified: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self._secret, payload.encode("utf-8"), hashlib.sha256).digest())
+
+    def issue(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """A token for `user`: {"token": ..., "expires_at": <unix time>}."""
+        expires_at = int(time.time()) + self.ttl
+        claims = {"uid": user["id"], "sub": user["username"], "exp": expires_at}
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        return {"token": f"{payload}.{self._sign(payload)}", "expires_at": expires_at}
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """The caller {"id", "username"} if `token` is genuine and unexpired, else None."""
+        now = time.time()
+        with self._lock:
+            claims = self._verified.get(token)
+            if claims is not None:
+                self._verified.move_to_end(token)
+                self.hits += 1
+        if claims is None:
+            claims = self._check(token)
+            if claims is None:
+                return None
+            with self._lock:
+                self.misses += 1
+                self._verified[token] = claims
+                if len(self._verified) > self.cache_size:
+                    self._verified.popitem(last=False)
+        if claims["exp"] <= now:
+            return None
+        return {"id": claims["uid"], "username": claims["sub"]}
+
+    def _check(self, token: str) -> Optional[Dict[str, Any]]:
+        payload, _, signature = token.partition(".")
+        if not payload or not hmac.compare_digest(self._sign(payload).encode("ascii"), signature.encode("utf-8")):
+            return None
+        try:
+            claims = json.loads(_b64decode(payload))
+            return {"uid": str(claims["uid"]), "sub": str(claims["sub"]), "exp": int(claims["exp"])}
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"cached": len(self._verified), "hits": self.hits, "misses": self.misses}
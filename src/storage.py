@@ -0,0 +1,900 @@
+import asyncio
+import bisect
+import functools
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: faster encoding of storage files
+    orjson = None
+
+
+# ---------- Collections ----------
+# Every collection is a list of records keyed by "id". "indexes" are the fields
+# the server looks records up by; "newest_first" mirrors the order the
+# endpoints have always returned (new requests/projects/comments on top).
+# Every write stamps the record with "version", a store-wide change sequence
+# number, so clients can ask for what changed since a version (see /sync).
+COLLECTIONS: Dict[str, Dict[str, Any]] = {
+    "users": {"indexes": ("username",), "newest_first": False},
+    "requests": {"indexes": ("from_username", "to_username"), "newest_first": True},
+    "projects": {"indexes": ("request_id",), "newest_first": True},
+    "comments": {"indexes": ("project_id",), "newest_first": True},
+}
+# Default batch size of `Storage.scan`
+SCAN_BATCH = 500
+
+
+# ---------- JSON file helpers ----------
+def encode_json(data) -> bytes:
+    """Compact UTF-8 JSON, as written to storage files."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            pass  # e.g. an integer beyond 64 bits, which the json module handles
+    # dumps, unlike dump, runs entirely in the C encoder
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def load_json(path: str, default):
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+    except Exception:
+        pass
+    return default
+
+def write_atomic(path: str, data):
+    """Writes JSON to a temp file and renames it over `path`.
+
+    A crash leaves either the old or the new file in place, never a
+    truncated one.
+    """
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(encode_json(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+# ---------- Backend interface ----------
+class Storage:
+    """Interface shared by all storage backends.
+
+    Records handed out by a backend must be treated as read-only; use
+    `update` to change them.
+    """
+
+    def get(self, collection: str, record_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the record with the given id, or None."""
+        raise NotImplementedError
+
+    def find(self, collection: str, **where: Any) -> List[Dict[str, Any]]:
+        """Returns records whose fields equal all of the given values."""
+        raise NotImplementedError
+
+    def find_any(self, collection: str, fields: Sequence[str], value: Any) -> List[Dict[str, Any]]:
+        """Returns records where any of `fields` equals `value`."""
+        raise NotImplementedError
+
+    def find_in(self, collection: str, field: str, values: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Returns records whose `field` is one of `values`."""
+        raise NotImplementedError
+
+    def insert(self, collection: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Stores a new record and returns it."""
+        raise NotImplementedError
+
+    def insert_unique(self, collection: str, record: Dict[str, Any], field: str) -> bool:
+        """Stores a new record unless one with the same `field` value exists.
+
+        The check and the insert are atomic; returns whether the record was stored.
+        """
+        raise NotImplementedError
+
+    def update(self, collection: str, record_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merges `fields` into a record and returns it, or None if it doesn't exist."""
+        raise NotImplementedError
+
+    def scan(
+        self, collection: str, fields: Sequence[str], values: Iterable[Any], cursor: int = 0, limit: int = SCAN_BATCH
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Returns a batch of records where any of `fields` is one of `values`, oldest first.
+
+        Returns up to `limit` records from `cursor` on, and the cursor of the
+        next batch (None after the last one). Start with cursor 0; cursors
+        are opaque and only valid for the backend that returned them.
+        `fields` must be indexed. Records inserted during a scan show up at
+        its end.
+        """
+        raise NotImplementedError
+
+    def find_changed(self, collection: str, since: int) -> List[Dict[str, Any]]:
+        """Returns records created or updated after version `since`, oldest change first.
+
+        `since` 0 returns every record, including ones written before
+        records carried a version.
+        """
+        raise NotImplementedError
+
+    def version(self) -> int:
+        """The version of the latest write."""
+        raise NotImplementedError
+
+    def collection_version(self, collection: str) -> int:
+        """The version of the latest write to one collection; 0 if it has none."""
+        raise NotImplementedError
+
+    def find_one(self, collection: str, **where: Any) -> Optional[Dict[str, Any]]:
+        """Returns the first record matching `where`, or None."""
+        matches = self.find(collection, **where)
+        return matches[0] if matches else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend counters exposed on /metrics."""
+        return {}
+
+    def close(self):
+        pass
+
+
+# ---------- JSON backend ----------
+class _Table:
+    """A loaded collection (oldest first) plus hash indexes over it.
+
+    `positions` maps record id -> list position and `index` maps each
+    indexed field -> value -> ascending list of positions. Records are never
+    removed, so positions stay valid for the lifetime of the table.
+
+    `changes` lists (version, position) pairs in version order. An update
+    appends a new pair and leaves the old one behind; pairs whose version
+    no longer matches the record are skipped when read.
+    """
+
+    def __init__(self, collection: str, records: List[Dict[str, Any]]):
+        self.records = records
+        self.positions: Dict[Any, int] = {}
+        self.index: Dict[str, Dict[Any, List[int]]] = {f: {} for f in COLLECTIONS[collection]["indexes"]}
+        for i, record in enumerate(records):
+            self._add(i, record)
+        self.changes: List[Tuple[int, int]] = sorted(
+            (r["version"], i) for i, r in enumerate(records) if r.get("version")
+        )
+
+    def _add(self, i: int, record: Dict[str, Any]):
+        self.positions[record.get("id")] = i
+        for field, values in self.index.items():
+            values.setdefault(record.get(field), []).append(i)
+
+    def append(self, record: Dict[str, Any]):
+        self.records.append(record)
+        self._add(len(self.records) - 1, record)
+        self.changes.append((record["version"], len(self.records) - 1))
+
+    def replace(self, i: int, record: Dict[str, Any]):
+        old = self.records[i]
+        self.records[i] = record
+        for field, values in self.index.items():
+            if old.get(field) != record.get(field):
+                values[old.get(field)].remove(i)
+                bisect.insort(values.setdefault(record.get(field), []), i)
+        self.changes.append((record["version"], i))
+
+    def lookup(self, field: str, value: Any) -> List[int]:
+        return self.index[field].get(value, [])
+
+    def changed_since(self, since: int) -> List[Dict[str, Any]]:
+        start = bisect.bisect_right(self.changes, (since, float("inf")))
+        return [
+            self.records[i] for version, i in self.changes[start:]
+            if self.records[i].get("version") == version
+        ]
+
+    def max_version(self) -> int:
+        return self.changes[-1][0] if self.changes else 0
+
+
+class JSONStorage(Storage):
+    """One JSON file per collection, rewritten in full on every write.
+
+    Parsed collections are cached in memory, keyed by file path. A cached
+    copy is reused for as long as the file's mtime and size are unchanged,
+    so reads only cost a stat() while edits made outside the server are
+    still picked up. Writes go through the cache. Each cached collection
+    carries hash indexes on its lookup fields (see `_Table`), built when it
+    is loaded and maintained on every write, so lookups cost in proportion
+    to the number of matches rather than the size of the collection.
+
+    In memory every collection is kept oldest-first so that inserts are
+    appends; newest-first collections are reversed when read from and
+    written to disk, so the file format is unchanged.
+
+    Every collection has its own lock, held while its cached table is read
+    or modified but not while its file is written. Files are replaced
+    atomically (see `write_atomic`) and writes are group-committed: a write
+    returns once a snapshot containing it is on disk, and a single snapshot
+    covers every write that arrived while the previous one was being
+    written.
+
+    Collections named in `journaled` are stored as the usual JSON file plus
+    an append-only JSON-lines journal (`<name>.journal.jsonl`). Writes only
+    append one line to the journal, and a background thread folds the
+    journal back into the JSON file once it holds `compact_every` entries.
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        journaled: Sequence[str] = (),
+        compact_every: int = 1000,
+        compact_interval: float = 30.0,
+    ):
+        self.paths = {name: os.path.join(data_dir, f"{name}.json") for name in COLLECTIONS}
+        self._cache: Dict[str, Tuple[Any, _Table]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self._locks = {name: threading.RLock() for name in COLLECTIONS}
+        self._flushed = {name: threading.Condition(self._locks[name]) for name in COLLECTIONS}
+        self._write_seq = {name: 0 for name in COLLECTIONS}
+        self._flush_seq = {name: 0 for name in COLLECTIONS}
+        self._flushing: set = set()
+        self.flushes = 0
+        self._version = 0
+        self._version_lock = threading.Lock()
+
+        self.journal_paths = {name: os.path.join(data_dir, f"{name}.journal.jsonl") for name in journaled}
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        self._journal_files: Dict[str, Any] = {}
+        self._journal_entries = {name: 0 for name in journaled}
+        self._journal_lock = threading.Lock()
+        # One compaction per collection at a time, or an older snapshot could
+        # replace a newer one and cut the journal at a stale offset
+        self._compact_locks = {name: threading.Lock() for name in journaled}
+        self._compactor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        # Load and index everything up front rather than on the first request
+        for name in COLLECTIONS:
+            with self._locks[name]:
+                self._load(name)
+
+    def _signature(self, collection: str):
+        signature = file_signature(self.paths[collection])
+        if collection in self.journal_paths:
+            return (signature, file_signature(self.journal_paths[collection]))
+        return signature
+
+    def _load(self, collection: str) -> _Table:
+        """Returns the cached table, re-reading the file if it changed. Call with the collection's lock held."""
+        path = self.paths[collection]
+        cached = self._cache.get(path)
+        # While our own writes are on their way to disk the table is newer than the file
+        if cached is not None and (
+            self._write_seq[collection] > self._flush_seq[collection]
+            or cached[0] == self._signature(collection)
+        ):
+            self.cache_hits += 1
+            return cached[1]
+
+        self.cache_misses += 1
+        signature = self._signature(collection)
+        records = load_json(path, [])
+        if COLLECTIONS[collection]["newest_first"]:
+            records.reverse()
+        if collection in self.journal_paths:
+            self._journal_entries[collection] = self._replay(collection, records)
+        table = _Table(collection, records)
+        self._cache[path] = (signature, table)
+        with self._version_lock:
+            self._version = max(self._version, table.max_version())
+        return table
+
+    def _next_version(self) -> int:
+        with self._version_lock:
+            self._version += 1
+            return self._version
+
+    def _ordered(self, collection: str, table: _Table, positions: Optional[Sequence[int]] = None) -> Iterable[Dict[str, Any]]:
+        """Iterates records (all, or the given ascending positions) in the order the endpoints return them."""
+        if positions is None:
+            positions = range(len(table.records))
+        if COLLECTIONS[collection]["newest_first"]:
+            positions = reversed(positions)
+        return (table.records[i] for i in positions)
+
+    def _file_order(self, collection: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return list(reversed(records)) if COLLECTIONS[collection]["newest_first"] else records[:]
+
+    # ----- Group commit -----
+    def _write(self, collection: str, table: _Table, entry: Dict[str, Any]) -> Optional[int]:
+        """Records a change already applied to `table`; call with the collection's lock held.
+
+        Journaled collections append `entry` to their journal and return
+        None. Other collections return a write sequence number to pass to
+        `_flush` once the lock is released.
+        """
+        if collection in self.journal_paths:
+            self._append(collection, entry, table)
+            return None
+        self._write_seq[collection] += 1
+        return self._write_seq[collection]
+
+    def _flush(self, collection: str, seq: int):
+        """Blocks until write `seq` of a collection is on disk.
+
+        Whichever waiting writer finds no flush in progress becomes the
+        leader: it snapshots the table under the lock and writes it without
+        the lock, covering its own write and every write queued behind it.
+        """
+        path = self.paths[collection]
+        flushed = self._flushed[collection]
+        while True:
+            with flushed:
+                while collection in self._flushing and self._flush_seq[collection] < seq:
+                    flushed.wait()
+                if self._flush_seq[collection] >= seq:
+                    return
+                self._flushing.add(collection)
+                target = self._write_seq[collection]
+                table = self._cache[path][1]
+                snapshot = self._file_order(collection, table.records)
+
+            try:
+                write_atomic(path, snapshot)
+            except Exception:
+                # The table keeps the unwritten changes; the next flush retries them
+                with flushed:
+                    self._flushing.discard(collection)
+                    flushed.notify_all()
+                raise
+
+            with flushed:
+                self._flushing.discard(collection)
+                self._flush_seq[collection] = target
+                self._cache[path] = (self._signature(collection), table)
+                self.flushes += 1
+                flushed.notify_all()
+
+    # ----- Journal -----
+    def _replay(self, collection: str, records: List[Dict[str, Any]]) -> int:
+        """Applies journal entries on top of the loaded file; returns how many were read.
+
+        Replaying is idempotent, so entries that were already folded into
+        the file by an interrupted compaction are harmless.
+        """
+        path = self.journal_paths[collection]
+        if not os.path.exists(path):
+            return 0
+
+        positions = {r.get("id"): i for i, r in enumerate(records)}
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crash
+                count += 1
+                if entry.get("op") == "insert":
+                    record = entry["record"]
+                    if record.get("id") not in positions:
+                        positions[record.get("id")] = len(records)
+                        records.append(record)
+                elif entry.get("op") == "update":
+                    i = positions.get(entry.get("id"))
+                    if i is not None:
+                        records[i] = {**records[i], **entry["fields"]}
+        return count
+
+    def _append(self, collection: str, entry: Dict[str, Any], table: _Table):
+        """Appends a journal entry; call with the collection's lock held."""
+        line = encode_json(entry) + b"\n"
+        with self._journal_lock:
+            f = self._journal_files.get(collection)
+            if f is None:
+                f = self._journal_files[collection] = open(self.journal_paths[collection], "ab")
+            f.write(line)
+            f.flush()
+            self._journal_entries[collection] += 1
+        self._cache[self.paths[collection]] = (self._signature(collection), table)
+        self._start_compactor()
+
+    def _start_compactor(self):
+        if self._compactor is None:
+            self._compactor = threading.Thread(target=self._compact_loop, name="journal-compactor", daemon=True)
+            self._compactor.start()
+
+    def _compact_loop(self):
+        while not self._stop.wait(self.compact_interval):
+            for collection in self.journal_paths:
+                if self._journal_entries[collection] >= self.compact_every:
+                    try:
+                        self.compact(collection)
+                    except Exception as e:
+                        print(f"✗ Journal compaction failed for {collection}: {e}")
+
+    def compact(self, collection: str):
+        """Folds the journal of a collection into its JSON file."""
+        with self._compact_locks[collection]:
+            self._compact(collection)
+
+    def _compact(self, collection: str):
+        journal_path = self.journal_paths[collection]
+        # Lock order is always compaction lock, collection lock, journal lock
+        with self._locks[collection], self._journal_lock:
+            records = self._file_order(collection, self._load(collection).records)
+            f = self._journal_files.get(collection)
+            offset = f.tell() if f else (os.path.getsize(journal_path) if os.path.exists(journal_path) else 0)
+
+        # The snapshot is written without holding the locks; writes keep appending meanwhile
+        write_atomic(self.paths[collection], records)
+
+        with self._locks[collection], self._journal_lock:
+            f = self._journal_files.pop(collection, None)
+            if f is not None:
+                f.close()
+            tail = b""
+            if os.path.exists(journal_path):
+                with open(journal_path, "rb") as src:
+                    src.seek(offset)
+                    tail = src.read()
+            tmp_path = f"{journal_path}.tmp"
+            with open(tmp_path, "wb") as dst:
+                dst.write(tail)
+            os.replace(tmp_path, journal_path)
+            self._journal_entries[collection] = tail.count(b"\n")
+            cached = self._cache.get(self.paths[collection])
+            if cached is not None:
+                self._cache[self.paths[collection]] = (self._signature(collection), cached[1])
+
+    # ----- Storage API -----
+    def get(self, collection, record_id):
+        with self._locks[collection]:
+            table = self._load(collection)
+            i = table.positions.get(record_id)
+            return table.records[i] if i is not None else None
+
+    def find(self, collection, **where):
+        with self._locks[collection]:
+            table = self._load(collection)
+            indexed = [k for k in where if k in table.index]
+            positions = table.lookup(indexed[0], where[indexed[0]]) if indexed else None
+            return [
+                r for r in self._ordered(collection, table, positions)
+                if all(r.get(k) == v for k, v in where.items())
+            ]
+
+    def find_any(self, collection, fields, value):
+        with self._locks[collection]:
+            table = self._load(collection)
+            if not all(f in table.index for f in fields):
+                return [
+                    r for r in self._ordered(collection, table)
+                    if any(r.get(f) == value for f in fields)
+                ]
+            positions = sorted(set().union(*(table.lookup(f, value) for f in fields)))
+            return list(self._ordered(collection, table, positions))
+
+    def find_in(self, collection, field, values):
+        with self._locks[collection]:
+            table = self._load(collection)
+            if field not in table.index:
+                values = set(values)
+                return [r for r in self._ordered(collection, table) if r.get(field) in values]
+            positions = sorted(set().union(*(table.lookup(field, v) for v in set(values))))
+            return list(self._ordered(collection, table, positions))
+
+    def insert(self, collection, record):
+        with self._locks[collection]:
+            table = self._load(collection)
+            record["version"] = self._next_version()
+            table.append(record)
+            seq = self._write(collection, table, {"op": "insert", "record": record})
+        if seq is not None:
+            self._flush(collection, seq)
+        return record
+
+    def insert_unique(self, collection, record, field):
+        with self._locks[collection]:
+            if self.find(collection, **{field: record.get(field)}):
+                return False
+            table = self._load(collection)
+            record["version"] = self._next_version()
+            table.append(record)
+            seq = self._write(collection, table, {"op": "insert", "record": record})
+        if seq is not None:
+            self._flush(collection, seq)
+        return True
+
+    def update(self, collection, record_id, fields):
+        with self._locks[collection]:
+            table = self._load(collection)
+            i = table.positions.get(record_id)
+            if i is None:
+                return None
+            fields = {**fields, "version": self._next_version()}
+            # Replace rather than mutate: the old dict may still be in use by a reader
+            record = {**table.records[i], **fields}
+            table.replace(i, record)
+            seq = self._write(collection, table, {"op": "update", "id": record_id, "fields": fields})
+        if seq is not None:
+            self._flush(collection, seq)
+        return record
+
+    def scan(self, collection, fields, values, cursor=0, limit=SCAN_BATCH):
+        values = set(values)
+        with self._locks[collection]:
+            table = self._load(collection)
+            # The cursor is a list position; each index list is ascending, so
+            # the next batch is the lowest `limit` positions at or after it
+            candidates = set()
+            for field in fields:
+                if field not in table.index:
+                    raise ValueError(f"{collection}.{field} is not indexed")
+                for value in values:
+                    positions = table.lookup(field, value)
+                    start = bisect.bisect_left(positions, cursor)
+                    candidates.update(positions[start:start + limit + 1])
+            batch = sorted(candidates)[:limit + 1]
+            records = [table.records[i] for i in batch[:limit]]
+        return records, (batch[limit - 1] + 1 if len(batch) > limit else None)
+
+    def find_changed(self, collection, since):
+        with self._locks[collection]:
+            table = self._load(collection)
+            if since <= 0:
+                return list(table.records)
+            return table.changed_since(since)
+
+    def version(self):
+        with self._version_lock:
+            return self._version
+
+    def collection_version(self, collection):
+        with self._locks[collection]:
+            return self._load(collection).max_version()
+
+    def stats(self):
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "backend": "json",
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_ratio": round(self.cache_hits / lookups, 4) if lookups else None,
+            "writes": sum(self._write_seq.values()),
+            "flushes": self.flushes,
+            "journal_entries": dict(self._journal_entries),
+        }
+
+    def close(self):
+        self._stop.set()
+        if self._compactor is not None and self._compactor is not threading.current_thread():
+            self._compactor.join()
+        for collection in self.journal_paths:
+            if self._journal_entries[collection]:
+                self.compact(collection)
+        with self._journal_lock:
+            for f in self._journal_files.values():
+                f.close()
+            self._journal_files.clear()
+
+
+# ---------- SQLite backend ----------
+class SQLiteStorage(Storage):
+    """SQLite database in WAL mode.
+
+    Each collection is a table holding the record as a JSON blob next to
+    indexed copies of its lookup fields and version, so reads are index
+    lookups and writes touch a single row. The latest version is kept in
+    the `meta` table and bumped inside each write's transaction.
+    """
+
+    def __init__(self, path: str, import_dir: Optional[str] = None):
+        self.path = path
+        self._local = threading.local()
+        self._create_schema()
+        if import_dir:
+            self._import_json(import_dir)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run alongside a writer."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        conn = self._conn()
+        for name, spec in COLLECTIONS.items():
+            columns = "".join(f", {col} TEXT" for col in spec["indexes"])
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} ("
+                f"seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                f"id TEXT NOT NULL UNIQUE, "
+                f"created_at TEXT{columns}, "
+                f"version INTEGER, "
+                f"data TEXT NOT NULL)"
+            )
+            # Databases created before records were versioned lack the column
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({name})")}
+            if "version" not in existing:
+                conn.execute(f"ALTER TABLE {name} ADD COLUMN version INTEGER")
+            for col in spec["indexes"] + ("version",):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_{col} ON {name} ({col})")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+
+    def _import_json(self, data_dir: str):
+        """Seeds an empty database from the JSON files of the JSON backend."""
+        conn = self._conn()
+        if any(conn.execute(f"SELECT 1 FROM {name} LIMIT 1").fetchone() for name in COLLECTIONS):
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for name, spec in COLLECTIONS.items():
+                records = load_json(os.path.join(data_dir, f"{name}.json"), [])
+                if spec["newest_first"]:
+                    records = list(reversed(records))
+                for record in records:
+                    self._insert_row(conn, name, record)
+            conn.execute(
+                "UPDATE meta SET value = MAX(value, ?) WHERE key = 'version'",
+                (max((self._max_version(conn, name) for name in COLLECTIONS), default=0),),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _max_version(self, conn: sqlite3.Connection, collection: str) -> int:
+        return conn.execute(f"SELECT COALESCE(MAX(version), 0) FROM {collection}").fetchone()[0]
+
+    def _next_version(self, conn: sqlite3.Connection) -> int:
+        """Claims the next version; call inside a write transaction."""
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def _insert_row(self, conn: sqlite3.Connection, collection: str, record: Dict[str, Any]):
+        cols = COLLECTIONS[collection]["indexes"] + ("version",)
+        names = ", ".join(("id", "created_at") + cols + ("data",))
+        marks = ", ".join("?" for _ in range(len(cols) + 3))
+        conn.execute(
+            f"INSERT INTO {collection} ({names}) VALUES ({marks})",
+            (record["id"], record.get("created_at"))
+            + tuple(record.get(col) for col in cols)
+            + (json.dumps(record, ensure_ascii=False),),
+        )
+
+    def _order(self, collection: str) -> str:
+        return "seq DESC" if COLLECTIONS[collection]["newest_first"] else "seq"
+
+    def _select(self, collection: str, where: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            f"SELECT data FROM {collection} WHERE {where} ORDER BY {self._order(collection)}",
+            tuple(params),
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, collection, record_id):
+        row = self._conn().execute(
+            f"SELECT data FROM {collection} WHERE id = ?", (record_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, collection, **where):
+        indexed = COLLECTIONS[collection]["indexes"]
+        sql_where = {k: v for k, v in where.items() if k in indexed}
+        if not sql_where:
+            return [
+                r for r in self._select(collection, "1", ())
+                if all(r.get(k) == v for k, v in where.items())
+            ]
+        records = self._select(
+            collection,
+            " AND ".join(f"{k} = ?" for k in sql_where),
+            list(sql_where.values()),
+        )
+        rest = {k: v for k, v in where.items() if k not in sql_where}
+        return [r for r in records if all(r.get(k) == v for k, v in rest.items())]
+
+    def find_any(self, collection, fields, value):
+        return self._select(collection, " OR ".join(f"{f} = ?" for f in fields), [value] * len(fields))
+
+    def find_in(self, collection, field, values):
+        values = list(set(values))
+        if not values:
+            return []
+        marks = ", ".join("?" for _ in values)
+        return self._select(collection, f"{field} IN ({marks})", values)
+
+    def insert(self, collection, record):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            record["version"] = self._next_version(conn)
+            self._insert_row(conn, collection, record)
+            conn.execute("COMMIT")
+            return record
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def insert_unique(self, collection, record, field):
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes the write lock, so no other insert can slip in between
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.find(collection, **{field: record.get(field)}):
+                conn.execute("ROLLBACK")
+                return False
+            record["version"] = self._next_version(conn)
+            self._insert_row(conn, collection, record)
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def update(self, collection, record_id, fields):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(f"SELECT data FROM {collection} WHERE id = ?", (record_id,)).fetchone()
+            if not row:
+                conn.execute("ROLLBACK")
+                return None
+            record = json.loads(row[0])
+            record.update(fields)
+            record["version"] = self._next_version(conn)
+            cols = COLLECTIONS[collection]["indexes"] + ("version",)
+            assignments = ", ".join(f"{col} = ?" for col in cols + ("data",))
+            conn.execute(
+                f"UPDATE {collection} SET {assignments} WHERE id = ?",
+                tuple(record.get(col) for col in cols)
+                + (json.dumps(record, ensure_ascii=False), record_id),
+            )
+            conn.execute("COMMIT")
+            return record
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def scan(self, collection, fields, values, cursor=0, limit=SCAN_BATCH):
+        # The cursor is the seq of the last record returned
+        values = list(set(values))
+        if not values:
+            return [], None
+        for field in fields:
+            if field not in COLLECTIONS[collection]["indexes"]:
+                raise ValueError(f"{collection}.{field} is not indexed")
+        marks = ", ".join("?" for _ in values)
+        matches = " OR ".join(f"{field} IN ({marks})" for field in fields)
+        rows = self._conn().execute(
+            f"SELECT seq, data FROM {collection} WHERE seq > ? AND ({matches}) ORDER BY seq LIMIT ?",
+            (cursor, *values * len(fields), limit + 1),
+        ).fetchall()
+        records = [json.loads(row[1]) for row in rows[:limit]]
+        return records, (rows[limit - 1][0] if len(rows) > limit else None)
+
+    def find_changed(self, collection, since):
+        if since <= 0:
+            return self._select(collection, "1", ())
+        rows = self._conn().execute(
+            f"SELECT data FROM {collection} WHERE version > ? ORDER BY version", (since,)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def version(self):
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def collection_version(self, collection):
+        return self._max_version(self._conn(), collection)
+
+    def stats(self):
+        return {"backend": "sqlite"}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# ---------- Async front ----------
+class AsyncStorage:
+    """Awaitable wrapper around a backend for use in `async def` endpoints.
+
+    Calls run on a dedicated thread pool, so disk writes and lock waits
+    never stall the event loop. With more than one worker, concurrent
+    writes to the JSON backend also get to share a group commit.
+    """
+
+    def __init__(self, backend: Storage, max_workers: int = 8):
+        self.backend = backend
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage-io")
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def get(self, collection: str, record_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self.backend.get, collection, record_id)
+
+    async def find(self, collection: str, **where: Any) -> List[Dict[str, Any]]:
+        return await self._run(self.backend.find, collection, **where)
+
+    async def find_one(self, collection: str, **where: Any) -> Optional[Dict[str, Any]]:
+        return await self._run(self.backend.find_one, collection, **where)
+
+    async def find_any(self, collection: str, fields: Sequence[str], value: Any) -> List[Dict[str, Any]]:
+        return await self._run(self.backend.find_any, collection, fields, value)
+
+    async def find_in(self, collection: str, field: str, values: Iterable[Any]) -> List[Dict[str, Any]]:
+        return await self._run(self.backend.find_in, collection, field, list(values))
+
+    async def insert(self, collection: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._run(self.backend.insert, collection, record)
+
+    async def insert_unique(self, collection: str, record: Dict[str, Any], field: str) -> bool:
+        return await self._run(self.backend.insert_unique, collection, record, field)
+
+    async def update(self, collection: str, record_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self._run(self.backend.update, collection, record_id, fields)
+
+    async def scan(
+        self, collection: str, fields: Sequence[str], values: Iterable[Any], cursor: int = 0, limit: int = SCAN_BATCH
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        return await self._run(self.backend.scan, collection, fields, list(values), cursor, limit)
+
+    async def find_changed(self, collection: str, since: int) -> List[Dict[str, Any]]:
+        return await self._run(self.backend.find_changed, collection, since)
+
+    async def version(self) -> int:
+        return await self._run(self.backend.version)
+
+    async def collection_version(self, collection: str) -> int:
+        return await self._run(self.backend.collection_version, collection)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.backend.close()
+
+
+def create_storage(data_dir: str) -> Storage:
+    """Builds the backend selected by FLASHGIG_STORAGE ("json" or "sqlite").
+
+    With the JSON backend, FLASHGIG_JOURNAL=1 keeps requests and comments in
+    append-only journals instead of rewriting their files on every write.
+    """
+    backend = os.environ.get("FLASHGIG_STORAGE", "json").strip().lower()
+    if backend == "sqlite":
+        return SQLiteStorage(os.path.join(data_dir, "flashgig.db"), import_dir=data_dir)
+    if backend == "json":
+        journaled = ("requests", "comments") if os.environ.get("FLASHGIG_JOURNAL") == "1" else ()
+        return JSONStorage(data_dir, journaled=journaled)
+    raise ValueError(f"Unknown storage backend: {backend}")
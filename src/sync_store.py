@@ -0,0 +1,270 @@
+# Client-side copy of the data the views show, kept current with incremental
+# syncs: each sync asks the server only for what changed since the version
+# the store last saw, so refreshing a long list costs bytes in proportion to
+# the changes. One store per user is shared by every view (get_sync_store).
+import asyncio
+from typing import Callable, Dict, Any, Optional, List, Tuple
+
+import async_api_client
+from api_client import APIClientError, cached_get, server_get
+
+# Seconds before reconnecting to /events, doubling up to the maximum
+EVENTS_RETRY_DELAY = 2
+EVENTS_RETRY_MAX_DELAY = 60
+
+
+def _newest_first(records) -> List[Dict[str, Any]]:
+    """Same order as the server's list endpoints: newest first by (created_at, id)."""
+    return sorted(records, key=lambda r: (r.get("created_at") or "", r.get("id") or ""), reverse=True)
+
+
+def _merge(target: Dict[str, Dict[str, Any]], records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stores records by id, keeping the higher version; returns the ones that changed."""
+    changed = []
+    for record in records:
+        current = target.get(record["id"])
+        if current is None or (record.get("version") or 0) > (current.get("version") or 0):
+            target[record["id"]] = record
+            changed.append(record)
+    return changed
+
+
+class SyncStore:
+    """Local copy of a user's connections, projects and open comment threads.
+
+    `sync()` asks the server only for what changed since the last sync
+    (`/sync?since=<version>`), so a refresh costs bytes in proportion to
+    the changes rather than to the size of the lists. Syncs go through the
+    response cache and are always revalidated, so a server that supports
+    conditional requests can answer an unchanged sync with a bodiless 304.
+    """
+
+    def __init__(self, username: str):
+        self.username = username
+        self.version = 0
+        self._requests: Dict[str, Dict[str, Any]] = {}
+        self._projects: Dict[str, Dict[str, Any]] = {}
+        self._comments: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._comment_versions: Dict[str, int] = {}
+        self._sync_task: Optional[asyncio.Future] = None
+        self._listeners: List[Tuple[Callable[[str, List[Dict[str, Any]]], None], Optional[str]]] = []
+        self._stream_task: Optional[asyncio.Future] = None
+        self._stream_key: Optional[Tuple[Optional[str]]] = None
+
+    def _sync_params(self, since: int, project_id: Optional[str] = None) -> Dict[str, str]:
+        params = {"user": self.username, "since": str(since)}
+        if project_id is not None:
+            params["project_id"] = project_id
+        return params
+
+    def _apply_sync(self, data: Dict[str, Any]) -> bool:
+        changed = _merge(self._requests, data.get("requests", []))
+        changed += _merge(self._projects, data.get("projects", []))
+        self.version = max(self.version, data.get("version", 0))
+        return bool(changed)
+
+    def sync(self) -> bool:
+        """Pulls changed connections and projects; returns whether anything changed.
+
+        Raises APIClientError if the server can't be reached.
+        """
+        return self._apply_sync(cached_get("/sync", params=self._sync_params(self.version), max_age=0) or {})
+
+    async def _sync_once(self) -> bool:
+        params = self._sync_params(self.version)
+        return self._apply_sync(await async_api_client.cached_get("/sync", params=params, max_age=0) or {})
+
+    async def sync_async(self) -> bool:
+        """`sync` for async handlers. Calls made while a sync is running share it."""
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.ensure_future(self._sync_once())
+        # A caller that gets cancelled must not cancel the sync the others wait on
+        return await asyncio.shield(self._sync_task)
+
+    def connections(self) -> List[Dict[str, Any]]:
+        """All known connection requests, newest first."""
+        return _newest_first(self._requests.values())
+
+    def projects(self) -> List[Dict[str, Any]]:
+        """Projects of the user's accepted connections, newest first."""
+        accepted = {r["id"] for r in self._requests.values() if r.get("status") == "accepted"}
+        return _newest_first(p for p in self._projects.values() if p.get("request_id") in accepted)
+
+    def _page_params(self, project_id: str, limit: int, cursor: Optional[str]) -> Dict[str, str]:
+        params = {"project_id": project_id, "limit": str(limit)}
+        if cursor:
+            params["cursor"] = cursor
+        return params
+
+    def _apply_page(self, project_id: str, page: Dict[str, Any], first: bool) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        comments = page.get("items", [])
+        _merge(self._comments.setdefault(project_id, {}), comments)
+        if first:
+            self._comment_versions[project_id] = page.get("version", 0)
+        return comments, page.get("next_cursor")
+
+    def load_comments_page(
+        self, project_id: str, limit: int = 50, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Fetches a page of a project's comments (newest first) and the next cursor.
+
+        The first page also starts change tracking for the project, so
+        `sync_comments` only returns comments written after it.
+        """
+        page = server_get("/comments", params=self._page_params(project_id, limit, cursor)) or {}
+        return self._apply_page(project_id, page, cursor is None)
+
+    async def load_comments_page_async(
+        self, project_id: str, limit: int = 50, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """`load_comments_page` for async handlers."""
+        page = await async_api_client.server_get("/comments", params=self._page_params(project_id, limit, cursor)) or {}
+        return self._apply_page(project_id, page, cursor is None)
+
+    def _apply_workspace(self, project_id: str, workspace: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+        if workspace.get("connection"):
+            _merge(self._requests, [workspace["connection"]])
+        _merge(self._projects, [workspace["project"]])
+        _, cursor = self._apply_page(project_id, workspace.get("comments", {}), True)
+        return workspace, cursor
+
+    def load_workspace(self, project_id: str, limit: int = 50) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Fetches a project's workspace (project, connection, participants and
+        the newest comments) in one request; returns it and the comments' next cursor.
+
+        Like the first `load_comments_page`, this starts change tracking for
+        the project's comments. A response younger than the cache TTL (e.g.
+        from `prefetch_workspace_async`) is used as is; `sync_comments` or
+        `follow` catch up on anything newer.
+        """
+        workspace = cached_get(f"/projects/{project_id}/workspace", params={"limit": str(limit)})
+        return self._apply_workspace(project_id, workspace)
+
+    async def load_workspace_async(self, project_id: str, limit: int = 50) -> Tuple[Dict[str, Any], Optional[str]]:
+        """`load_workspace` for async handlers."""
+        workspace = await async_api_client.cached_get(
+            f"/projects/{project_id}/workspace", params={"limit": str(limit)}
+        )
+        return self._apply_workspace(project_id, workspace)
+
+    async def prefetch_workspace_async(self, project_id: str, limit: int = 50):
+        """Warms the response cache so a `load_workspace` within the cache TTL needs no request."""
+        await async_api_client.cached_get(f"/projects/{project_id}/workspace", params={"limit": str(limit)})
+
+    def _apply_comments(self, project_id: str, since: int, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        _merge(self._requests, data.get("requests", []))
+        _merge(self._projects, data.get("projects", []))
+        changed = _merge(self._comments.setdefault(project_id, {}), data.get("comments", []))
+        self._comment_versions[project_id] = max(since, data.get("version", 0))
+        return _newest_first(changed)
+
+    def sync_comments(self, project_id: str) -> List[Dict[str, Any]]:
+        """Returns the project's comments created or edited since the last call, newest first."""
+        since = self._comment_versions.get(project_id, 0)
+        data = server_get("/sync", params=self._sync_params(since, project_id)) or {}
+        return self._apply_comments(project_id, since, data)
+
+    async def sync_comments_async(self, project_id: str) -> List[Dict[str, Any]]:
+        """`sync_comments` for async handlers."""
+        since = self._comment_versions.get(project_id, 0)
+        data = await async_api_client.server_get("/sync", params=self._sync_params(since, project_id)) or {}
+        return self._apply_comments(project_id, since, data)
+
+    def subscribe(self, on_change: Callable[[str, List[Dict[str, Any]]], None], project_id: Optional[str] = None):
+        """Calls `on_change` with every change the server pushes, until `unsubscribe`.
+
+        `on_change("connections", records)` fires when connection requests
+        (and with them the visible projects) change, for every subscriber;
+        `on_change("comments", records)` with new comments on `project_id`,
+        for the subscribers of that project. All subscribers share one
+        `/events` stream per store, opened with the first one and closed
+        with the last. Call from the page's event loop.
+        """
+        self._listeners.append((on_change, project_id))
+        self._follow_stream()
+
+    def unsubscribe(self, on_change: Callable[[str, List[Dict[str, Any]]], None], project_id: Optional[str] = None):
+        """Stops calling `on_change`; the stream closes when nobody listens."""
+        if (on_change, project_id) in self._listeners:
+            self._listeners.remove((on_change, project_id))
+        self._follow_stream()
+
+    async def follow(self, on_change: Callable[[str, List[Dict[str, Any]]], None], project_id: Optional[str] = None):
+        """`subscribe` until cancelled: run it with `page.run_task` and cancel
+        the returned future when the view goes away."""
+        self.subscribe(on_change, project_id)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self.unsubscribe(on_change, project_id)
+
+    def _follow_stream(self):
+        """Runs the stream the subscribers need: none, or the user's plus the
+        most recently followed project (the server streams one project)."""
+        if not self._listeners:
+            wanted = None
+        else:
+            projects = [project_id for _, project_id in self._listeners if project_id is not None]
+            wanted = (projects[-1] if projects else None,)
+        if wanted == self._stream_key and self._stream_task is not None and not self._stream_task.done():
+            return
+        if self._stream_task is not None:
+            self._stream_task.cancel()
+            self._stream_task = None
+        self._stream_key = wanted
+        if wanted is not None:
+            self._stream_task = asyncio.ensure_future(self._stream(wanted[0]))
+
+    def _notify(self, kind: str, records: List[Dict[str, Any]], project_id: Optional[str] = None):
+        for on_change, listener_project in list(self._listeners):
+            if kind == "comments" and listener_project != project_id:
+                continue
+            try:
+                on_change(kind, records)
+            except Exception as e:
+                # One broken view must not keep the others from hearing about the change
+                print(f"Change listener failed: {e}")
+
+    async def _stream(self, project_id: Optional[str]):
+        """Applies the server's pushed events to the store and tells the
+        subscribers. Every (re)connect first catches up with a sync, so
+        nothing written while the stream was down is missed. Dropped
+        connections and server errors are retried with exponential backoff;
+        a 4xx (e.g. an expired session) stops the stream until the next
+        subscriber."""
+        params = {"user": self.username}
+        if project_id is not None:
+            params["project_id"] = project_id
+        delay = EVENTS_RETRY_DELAY
+        while True:
+            try:
+                async for event, data in async_api_client.stream_events(params):
+                    if event == "ready":
+                        delay = EVENTS_RETRY_DELAY
+                        if await self.sync_async():
+                            self._notify("connections", [])
+                        if project_id is not None and project_id in self._comment_versions:
+                            comments = await self.sync_comments_async(project_id)
+                            if comments:
+                                self._notify("comments", comments, project_id)
+                    elif event == "request" and _merge(self._requests, [data]):
+                        if data.get("status") == "accepted":
+                            await self.sync_async()  # brings in the connection's projects
+                        self._notify("connections", [data])
+                    elif event == "comment" and _merge(self._comments.setdefault(data["project_id"], {}), [data]):
+                        self._notify("comments", [data], data["project_id"])
+            except APIClientError as e:
+                if e.status is not None and 400 <= e.status < 500 and e.status not in (408, 429):
+                    print(f"Stopped following changes: {e}")
+                    return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, EVENTS_RETRY_MAX_DELAY)
+
+_stores: Dict[str, SyncStore] = {}
+
+
+def get_sync_store(username: str) -> SyncStore:
+    """The shared store for a user, created on first use."""
+    if username not in _stores:
+        _stores[username] = SyncStore(username)
+    return _stores[username]
@@ -0,0 +1,74 @@
+# Background work owned by a view or dialog. Loads run on the page's event
+# loop through page.run_task, so a slow server never holds up navigation.
+# They are cancelled together when the owner goes away, so a load that
+# finishes late can't update a control that is no longer on the page, and
+# the owner can show a loading indicator while any of them are still running.
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+import flet as ft
+
+
+class ViewTasks:
+    """Tracks the tasks a control starts; see `run` and `cancel_all`."""
+
+    def __init__(self, page: ft.Page, on_loading: Optional[Callable[[bool], None]] = None):
+        self.page = page
+        self.on_loading = on_loading
+        self._lock = threading.Lock()  # handlers may call in from Flet's worker threads
+        self._tasks: Set[Future] = set()
+        self._keys: Dict[str, Future] = {}
+        self._loading = 0
+        self._cancelled = False
+
+    def run(self, handler: Callable[..., Awaitable], *args: Any, key: Optional[str] = None, loading: bool = True) -> Future:
+        """Runs `handler(*args)` (an async function) on the page loop.
+
+        With `key`, a call while a task with the same key is still running
+        returns that task instead of starting another, so e.g. repeated
+        refresh clicks cost one load. Tasks started with loading=False
+        (long-lived listeners) don't fire `on_loading`.
+        """
+        with self._lock:
+            running = self._keys.get(key) if key is not None else None
+            if running is not None and not running.done():
+                return running
+            self._cancelled = False
+            task = self.page.run_task(handler, *args)
+            self._tasks.add(task)
+            if key is not None:
+                self._keys[key] = task
+            if loading:
+                self._loading += 1
+            started_loading = loading and self._loading == 1
+        if started_loading:
+            self._notify(True)
+        task.add_done_callback(lambda done: self._finished(done, key, loading))
+        return task
+
+    def _finished(self, task: Future, key: Optional[str], loading: bool):
+        with self._lock:
+            if task not in self._tasks:
+                return  # already accounted for by cancel_all
+            self._tasks.discard(task)
+            if key is not None and self._keys.get(key) is task:
+                del self._keys[key]
+            if loading:
+                self._loading -= 1
+            stopped_loading = loading and self._loading == 0
+        if stopped_loading:
+            self._notify(False)
+
+    def _notify(self, loading: bool):
+        if self.on_loading is not None and not self._cancelled:
+            self.on_loading(loading)
+
+    def cancel_all(self):
+        """Cancels every running task, without further loading callbacks; call from will_unmount."""
+        with self._lock:
+            tasks, self._tasks, self._keys = self._tasks, set(), {}
+            self._loading = 0
+            self._cancelled = True
+        for task in tasks:
+            task.cancel()
@@ -1,5 +1,9 @@
 import flet as ft
-from api_client import server_get, server_patch, APIClientError
+import async_api_client
+from api_client import APIClientError
+from reconcile import reconcile
+from sync_store import get_sync_store
+from tasks import ViewTasks
 
 
 class ConnectionCard(ft.Container):
@@ -13,41 +17,17 @@ class ConnectionCard(ft.Container):
         current_user = page.session_username
         is_incoming = connection_data["to_username"] == current_user
         other_user = connection_data["from_username"] if is_incoming else connection_data["to_username"]
+        self.is_incoming = is_incoming
         
-        # Status badge
-        status = connection_data["status"]
-        if status == "accepted":
-            status_badge = ft.Container(
-                content=ft.Text("Accepted", color=ft.Colors.WHITE, size=12),
-                padding=ft.padding.symmetric(horizontal=12, vertical=6),
-                bgcolor=ft.Colors.GREEN,
-                border_radius=15,
-            )
-        else:
-            status_badge = ft.Container(
-                content=ft.Text("Pending", color=ft.Colors.WHITE, size=12),
-                padding=ft.padding.symmetric(horizontal=12, vertical=6),
-                bgcolor=ft.Colors.AMBER,
-                border_radius=15,
-            )
-        
-        # Action buttons (only show for incoming pending requests)
-        action_buttons = ft.Row([], spacing=5)
-        if is_incoming and status == "requested":
-            action_buttons.controls = [
-                ft.IconButton(
-                    icon=ft.Icons.CHECK,
-                    icon_color=ft.Colors.GREEN,
-                    tooltip="Accept",
-                    on_click=lambda e: self._accept_request(),
-                ),
-                ft.IconButton(
-                    icon=ft.Icons.CLOSE,
-                    icon_color=ft.Colors.RED,
-                    tooltip="Reject",
-                    on_click=lambda e: self._reject_request(),
-                ),
-            ]
+        # Status badge and action buttons follow the status; see set_data
+        self.status_text = ft.Text("", color=ft.Colors.WHITE, size=12)
+        self.status_badge = ft.Container(
+            content=self.status_text,
+            padding=ft.padding.symmetric(horizontal=12, vertical=6),
+            border_radius=15,
+        )
+        self.action_buttons = ft.Row([], spacing=5)
+        self.set_data(connection_data)
         
         # Direction indicator
         direction = "← From" if is_incoming else "To →"
@@ -67,11 +47,11 @@ class ConnectionCard(ft.Container):
                     expand=2,
                 ),
                 ft.Container(
-                    content=status_badge,
+                    content=self.status_badge,
                     expand=1,
                 ),
                 ft.Container(
-                    content=action_buttons,
+                    content=self.action_buttons,
                     expand=1,
                 ),
             ],
@@ -80,9 +60,41 @@ class ConnectionCard(ft.Container):
         
         self.padding = 15
         self.border_radius = 10
+        self.border = ft.border.only(bottom=ft.border.BorderSide(1, ft.Colors.OUTLINE))
         self.on_hover = self._on_hover
         self.animate = ft.Animation(150, ft.AnimationCurve.EASE)
     
+    def set_data(self, connection_data: dict):
+        """Show the connection's current status without rebuilding the card"""
+        self.connection_data = connection_data
+        self.data = connection_data
+        status = connection_data["status"]
+        if status == "accepted":
+            self.status_text.value = "Accepted"
+            self.status_badge.bgcolor = ft.Colors.GREEN
+        else:
+            self.status_text.value = "Pending"
+            self.status_badge.bgcolor = ft.Colors.AMBER
+        
+        # Action buttons (only show for incoming pending requests)
+        if self.is_incoming and status == "requested":
+            self.action_buttons.controls = [
+                ft.IconButton(
+                    icon=ft.Icons.CHECK,
+                    icon_color=ft.Colors.GREEN,
+                    tooltip="Accept",
+                    on_click=lambda e: self.page.run_task(self._accept_request),
+                ),
+                ft.IconButton(
+                    icon=ft.Icons.CLOSE,
+                    icon_color=ft.Colors.RED,
+                    tooltip="Reject",
+                    on_click=lambda e: self._reject_request(),
+                ),
+            ]
+        else:
+            self.action_buttons.controls = []
+    
     def _on_hover(self, e):
         if e.data == "true":
             self.bgcolor = ft.Colors.TERTIARY_CONTAINER
@@ -90,10 +102,10 @@ class ConnectionCard(ft.Container):
             self.bgcolor = None
         self.update()
     
-    def _accept_request(self):
+    async def _accept_request(self):
         """Accept the connection request"""
         try:
-            server_patch(f"/requests/{self.connection_data['id']}", {"status": "accepted"})
+            await async_api_client.server_patch(f"/requests/{self.connection_data['id']}", {"status": "accepted"})
             print(f"Accepted request from {self.connection_data['from_username']}")
             if self.on_action:
                 self.on_action()
@@ -120,15 +132,26 @@ class ConnectionsView(ft.Container):
         # Container for cards
         self.cards_container = ft.Column([], spacing=5, scroll=ft.ScrollMode.AUTO)
         
+        # Shown in the header while a load is in flight
+        self.progress = ft.ProgressRing(width=16, height=16, stroke_width=2, visible=False)
+        
+        # Loads and the pushed-change listener, cancelled when the view is unmounted
+        self.tasks = ViewTasks(page, on_loading=self._show_loading)
+        
         self.content = ft.Column(
             [
                 ft.Row(
                     [
                         ft.Text("Connections", size=32, font_family="Roboto-Bold", color=ft.Colors.ON_SURFACE),
-                        ft.IconButton(
-                            icon=ft.Icons.REFRESH,
-                            tooltip="Refresh",
-                            on_click=lambda e: self._load_connections(),
+                        ft.Row(
+                            [
+                                self.progress,
+                                ft.IconButton(
+                                    icon=ft.Icons.REFRESH,
+                                    tooltip="Refresh",
+                                    on_click=lambda e: self._reload(),
+                                ),
+                            ],
                         ),
                     ],
                     alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
@@ -145,34 +168,59 @@ class ConnectionsView(ft.Container):
     
     def did_mount(self):
         """Called after the view is added to the page"""
-        self._load_connections()
+        self._reload()
+        store = get_sync_store(self.page.session_username)
+        self.tasks.run(store.follow, self._on_store_change, loading=False)
     
-    def _load_connections(self):
-        """Load connections from API"""
-        self.cards_container.controls = [self.loading_text]
-        self.update()
+    def will_unmount(self):
+        """Cancel loads still in flight and stop listening for pushed connection requests"""
+        self.tasks.cancel_all()
+    
+    def _show_loading(self, loading):
+        self.progress.visible = loading
+        if self.page:
+            self.progress.update()
+    
+    def _on_store_change(self, kind, records):
+        """Re-render when requests arrive or change"""
+        if kind == "connections":
+            self._show_connections(get_sync_store(self.page.session_username).connections())
+    
+    async def _load_connections(self):
+        """Show the connections already synced at once, then refresh them without blocking the UI"""
+        store = get_sync_store(self.page.session_username)
+        cached = store.version > 0
+        if cached:
+            self._show_connections(store.connections())
+        else:
+            self.cards_container.controls = [self.loading_text]
+            self.update()
         
         try:
-            username = self.page.session_username
-            connections = server_get(f"/requests?user={username}")
-            
-            if not connections:
-                self.cards_container.controls = [
-                    ft.Text("No connections yet. Click 'New' to create one!", color=ft.Colors.ON_SURFACE)
-                ]
-            else:
-                # Create cards
-                cards = []
-                for conn in connections:
-                    cards.append(ConnectionCard(self.page, conn, on_action=self._load_connections))
-                    cards.append(ft.Divider(color=ft.Colors.OUTLINE, height=1))
-                
-                self.cards_container.controls = cards
-            
-            self.update()
-            
+            if await store.sync_async() or not cached:
+                self._show_connections(store.connections())
         except APIClientError as ex:
             self.cards_container.controls = [
                 ft.Text(f"Failed to load connections: {ex}", color="error")
             ]
-            self.update()
\ No newline at end of file
+            self.update()
+    
+    def _show_connections(self, connections):
+        """Render connection cards, or the empty state, reusing cards that are already shown"""
+        if not connections:
+            self.cards_container.controls = [
+                ft.Text("No connections yet. Click 'New' to create one!", color=ft.Colors.ON_SURFACE)
+            ]
+        else:
+            self.cards_container.controls = reconcile(
+                self.cards_container.controls,
+                connections,
+                create=lambda conn: ConnectionCard(self.page, conn, on_action=self._reload),
+                patch=lambda card, conn: card.set_data(conn),
+            )
+        
+        self.cards_container.update()
+    
+    def _reload(self):
+        """Load connections in the background; a load already running is reused"""
+        self.tasks.run(self._load_connections, key="connections")
\ No newline at end of file
@@ -1,6 +1,14 @@
 import flet as ft
 from components.OverviewCards import OverviewCard
-from api_client import server_get, APIClientError
+from api_client import APIClientError
+from reconcile import reconcile
+from sync_store import get_sync_store
+from prefetch import get_prefetcher
+from tasks import ViewTasks
+from views.ProjectView import COMMENTS_PAGE_SIZE
+
+# Hovering a card this long prefetches its project's workspace
+HOVER_PREFETCH_DELAY = 0.15
 
 
 class HomeView(ft.Container):
@@ -15,15 +23,26 @@ class HomeView(ft.Container):
         # Container for project cards
         self.projects_row = ft.Row([], scroll=ft.ScrollMode.AUTO)
         
+        # Shown in the header while a load is in flight
+        self.progress = ft.ProgressRing(width=16, height=16, stroke_width=2, visible=False)
+        
+        # Loads and the pushed-change listener, cancelled when the view is unmounted
+        self.tasks = ViewTasks(page, on_loading=self._show_loading)
+        
         self.content = ft.Column(
             [
                 ft.Row(
                     [
                         ft.Text("Overview", size=32, font_family="Roboto-Bold", color=ft.Colors.ON_SURFACE),
-                        ft.IconButton(
-                            icon=ft.Icons.REFRESH,
-                            tooltip="Refresh",
-                            on_click=lambda e: self._load_projects(),
+                        ft.Row(
+                            [
+                                self.progress,
+                                ft.IconButton(
+                                    icon=ft.Icons.REFRESH,
+                                    tooltip="Refresh",
+                                    on_click=lambda e: self._reload(),
+                                ),
+                            ],
                         ),
                     ],
                     alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
@@ -35,14 +54,32 @@ class HomeView(ft.Container):
     
     def did_mount(self):
         """Called after the view is added to the page"""
-        self._load_projects()
+        self._reload()
+        if getattr(self.page, "session_username", None):
+            store = get_sync_store(self.page.session_username)
+            self.tasks.run(store.follow, self._on_store_change, loading=False)
     
-    def _load_projects(self):
-        """Load projects from API"""
-        self.projects_row.controls = [self.loading_text]
-        if self.page:  # Only update if added to page
-            self.update()
-        
+    def will_unmount(self):
+        """Cancel loads still in flight, stop listening for pushed changes and drop pending card prefetches"""
+        self.tasks.cancel_all()
+        get_prefetcher(self.page).cancel(prefix="workspace:")
+    
+    def _reload(self):
+        """Load projects in the background; a load already running is reused"""
+        self.tasks.run(self._load_projects, key="projects")
+    
+    def _show_loading(self, loading):
+        self.progress.visible = loading
+        if self.page:
+            self.progress.update()
+    
+    def _on_store_change(self, kind, records):
+        """Re-render when a connection (and with it the project list) changes"""
+        if kind == "connections":
+            self._show_projects(get_sync_store(self.page.session_username).projects())
+    
+    async def _load_projects(self):
+        """Show the projects already synced at once, then refresh them without blocking the UI"""
         # Check if user is logged in
         if not hasattr(self.page, 'session_username') or not self.page.session_username:
             self.projects_row.controls = [
@@ -55,56 +92,18 @@ class HomeView(ft.Container):
                 self.update()
             return
         
-        try:
-            username = self.page.session_username
-            projects = server_get(f"/projects?user={username}")
-            
-            if not projects:
-                self.projects_row.controls = [
-                    ft.Container(
-                        content=ft.Column(
-                            [
-                                ft.Icon(ft.Icons.FOLDER_OPEN, size=64, color=ft.Colors.ON_SURFACE),
-                                ft.Text("No projects yet", size=20, color=ft.Colors.ON_SURFACE),
-                                ft.Text(
-                                    "Create a connection and start collaborating!",
-                                    size=14,
-                                    color=ft.Colors.ON_SURFACE,
-                                ),
-                            ],
-                            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                            spacing=10,
-                        ),
-                        padding=50,
-                    )
-                ]
-            else:
-                # Create cards for each project
-                cards = []
-                for project in projects:
-                    # Use placeholder images for now
-                    images = [
-                        "https://images.unsplash.com/photo-1557821552-17105176677c",
-                        "https://images.unsplash.com/photo-1563986768609-322da13575f3",
-                        "https://images.unsplash.com/photo-1677442136019-21780ecad995",
-                        "https://images.unsplash.com/photo-1460925895917-afdab827c52f",
-                    ]
-                    
-                    card = OverviewCard(
-                        self.page,
-                        title=project["title"],
-                        subtitle=project.get("description", "No description"),
-                        image=images[len(cards) % len(images)],
-                        connection_data={"name": "Connection", "role": project.get("status", "in_progress")},
-                        on_open=lambda e, p=project: self._open_project(p),
-                    )
-                    cards.append(card)
-                
-                self.projects_row.controls = cards
-            
+        store = get_sync_store(self.page.session_username)
+        cached = store.version > 0
+        if cached:
+            self._show_projects(store.projects())
+        else:
+            self.projects_row.controls = [self.loading_text]
             if self.page:  # Only update if added to page
                 self.update()
-            
+        
+        try:
+            if await store.sync_async() or not cached:
+                self._show_projects(store.projects())
         except APIClientError as ex:
             self.projects_row.controls = [
                 ft.Text(f"Failed to load projects: {ex}", color="error")
@@ -112,6 +111,77 @@ class HomeView(ft.Container):
             if self.page:  # Only update if added to page
                 self.update()
     
+    def _show_projects(self, projects):
+        """Render project cards, or the empty state, reusing cards that are already shown"""
+        if not projects:
+            self.projects_row.controls = [
+                ft.Container(
+                    content=ft.Column(
+                        [
+                            ft.Icon(ft.Icons.FOLDER_OPEN, size=64, color=ft.Colors.ON_SURFACE),
+                            ft.Text("No projects yet", size=20, color=ft.Colors.ON_SURFACE),
+                            ft.Text(
+                                "Create a connection and start collaborating!",
+                                size=14,
+                                color=ft.Colors.ON_SURFACE,
+                            ),
+                        ],
+                        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                        spacing=10,
+                    ),
+                    padding=50,
+                )
+            ]
+        else:
+            self.projects_row.controls = reconcile(
+                self.projects_row.controls,
+                projects,
+                create=self._project_card,
+                patch=lambda card, project: card.set_text(
+                    project["title"],
+                    project.get("description", "No description"),
+                    project.get("status", "in_progress"),
+                ),
+            )
+        
+        if self.page:  # Only update if added to page
+            self.projects_row.update()
+    
+    def _project_card(self, project):
+        """Card for one project"""
+        # Use placeholder images for now, picked per project so they don't shuffle
+        images = [
+            "https://images.unsplash.com/photo-1557821552-17105176677c",
+            "https://images.unsplash.com/photo-1563986768609-322da13575f3",
+            "https://images.unsplash.com/photo-1677442136019-21780ecad995",
+            "https://images.unsplash.com/photo-1460925895917-afdab827c52f",
+        ]
+        
+        card = OverviewCard(
+            self.page,
+            title=project["title"],
+            subtitle=project.get("description", "No description"),
+            image=images[sum(map(ord, project["id"])) % len(images)],
+            connection_data={"name": "Connection", "role": project.get("status", "in_progress")},
+            on_open=lambda e: self._open_project(card.data),  # data is the project as last rendered
+            on_hover=lambda e: self._on_card_hover(e, card.data["id"]),
+        )
+        return card
+    
+    def _on_card_hover(self, e, project_id):
+        """Warm the project's workspace while the pointer rests on its card"""
+        prefetcher = get_prefetcher(self.page)
+        key = f"workspace:{project_id}"
+        if e.data == "true":
+            store = get_sync_store(self.page.session_username)
+            prefetcher.schedule(
+                key,
+                lambda: store.prefetch_workspace_async(project_id, COMMENTS_PAGE_SIZE),
+                delay=HOVER_PREFETCH_DELAY,
+            )
+        else:
+            prefetcher.cancel(key)
+    
     def _open_project(self, project):
         """Open project detail view"""
         print(f"Opening project: {project['title']}")
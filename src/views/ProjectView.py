@@ -1,5 +1,14 @@
+
 import flet as ft
-from api_client import server_get, server_post, server_patch, APIClientError
+import async_api_client
+from api_client import APIClientError
+from reconcile import reconcile
+from sync_store import get_sync_store
+from tasks import ViewTasks
+
+COMMENTS_PAGE_SIZE = 50
+# Fetch the next page of older comments once the list is scrolled this close to its end
+COMMENTS_PREFETCH_PX = 400
 
 
 class CommentCard(ft.Container):
@@ -8,9 +17,9 @@ class CommentCard(ft.Container):
     def __init__(self, comment_data: dict):
         super().__init__()
         
-        timestamp_text = ""
-        if comment_data.get("timestamp"):
-            timestamp_text = f" @ {comment_data['timestamp']}s"
+        self.timestamp_text = ft.Text("", size=12, color=ft.Colors.ON_SURFACE)
+        self.body_text = ft.Text("", color=ft.Colors.ON_SURFACE)
+        self.set_data(comment_data)
         
         self.content = ft.Column(
             [
@@ -21,11 +30,11 @@ class CommentCard(ft.Container):
                             weight=ft.FontWeight.BOLD,
                             color=ft.Colors.PRIMARY,
                         ),
-                        ft.Text(timestamp_text, size=12, color=ft.Colors.ON_SURFACE),
+                        self.timestamp_text,
                     ],
                     spacing=5,
                 ),
-                ft.Text(comment_data["text"], color=ft.Colors.ON_SURFACE),
+                self.body_text,
                 ft.Text(
                     comment_data["created_at"][:10],
                     size=11,
@@ -40,6 +49,12 @@ class CommentCard(ft.Container):
         self.border_radius = 8
         self.bgcolor = "surfacevariant"
         self.border = ft.border.all(1, ft.Colors.OUTLINE)
+    
+    def set_data(self, comment_data: dict):
+        """Show an edited comment without rebuilding the card"""
+        self.data = comment_data
+        self.timestamp_text.value = f" @ {comment_data['timestamp']}s" if comment_data.get("timestamp") else ""
+        self.body_text.value = comment_data["text"]
 
 
 class ProjectView(ft.Container):
@@ -51,6 +66,10 @@ class ProjectView(ft.Container):
         self.project_id = project_id
         self.expand = True
         self.project_data = None
+        self.comments_cursor = None
+        self.loading_older = False
+        # Loads and the pushed-comment listener, cancelled when the view is unmounted
+        self.tasks = ViewTasks(page)
         
         # Comment input
         self.comment_field = ft.TextField(
@@ -73,8 +92,23 @@ class ProjectView(ft.Container):
             on_click=self._send_comment,
         )
         
-        # Comments container
-        self.comments_container = ft.Column([], spacing=10, scroll=ft.ScrollMode.AUTO)
+        # Comments list: only rows on screen are built, and scrolling near the
+        # end fetches the next page of older comments
+        self.comments_container = ft.ListView(
+            [],
+            spacing=10,
+            expand=True,
+            build_controls_on_demand=True,
+            on_scroll_interval=100,
+            on_scroll=self._on_comments_scroll,
+        )
+        
+        self.load_older_button = ft.TextButton(
+            "Load older comments",
+            icon=ft.Icons.EXPAND_MORE,
+            visible=False,
+            on_click=self._load_older_comments,
+        )
         
         # Status dropdown
         self.status_dropdown = ft.Dropdown(
@@ -110,16 +144,27 @@ class ProjectView(ft.Container):
                     padding=20,
                 ),
             ],
-            scroll=ft.ScrollMode.AUTO,
+            expand=True,
         )
         
-        # Load project data
-        self._load_project()
+    def did_mount(self):
+        """Called after the view is added to the page"""
+        self.tasks.run(self._load_project, key="project")
+    
+    def will_unmount(self):
+        """Cancel the load if still in flight and stop listening for pushed comments"""
+        self.tasks.cancel_all()
     
-    def _load_project(self):
-        """Load project details"""
+    async def _load_project(self):
+        """Load project details, participants and the first page of comments in one request"""
         try:
-            self.project_data = server_get(f"/projects/{self.project_id}")
+            store = get_sync_store(self.page.session_username)
+            workspace, self.comments_cursor = await store.load_workspace_async(
+                self.project_id, limit=COMMENTS_PAGE_SIZE
+            )
+            self.project_data = workspace["project"]
+            self._show_comments(workspace["comments"].get("items", []))
+            participants = ", ".join(user["username"] for user in workspace.get("participants", []))
             
             # Update title
             self.content.controls[0].controls[1].value = self.project_data["title"]
@@ -138,6 +183,10 @@ class ProjectView(ft.Container):
                             ],
                             spacing=10,
                         ),
+                        ft.Text(
+                            f"Participants: {participants or '-'}",
+                            color=ft.Colors.ON_SURFACE,
+                        ),
                         ft.Text(
                             "Description:",
                             weight=ft.FontWeight.BOLD,
@@ -161,6 +210,7 @@ class ProjectView(ft.Container):
                     [
                         ft.Text("Comments", size=20, font_family="Roboto-Bold", color=ft.Colors.ON_SURFACE),
                         self.comments_container,
+                        self.load_older_button,
                         ft.Divider(),
                         ft.Row(
                             [
@@ -172,46 +222,100 @@ class ProjectView(ft.Container):
                         ),
                     ],
                     spacing=15,
+                    expand=True,
                 ),
                 padding=20,
+                expand=True,
             )
             
             # Update main content
             self.content.controls[2] = ft.Column(
                 [info_section, comments_section],
                 spacing=20,
+                expand=True,
             )
             
-            # Load comments
-            self._load_comments()
-            
             self.update()
             
+            # New comments from others now arrive as they are posted
+            self.tasks.run(store.follow, self._on_store_change, self.project_id, loading=False)
+            
         except APIClientError as ex:
             print(f"Failed to load project: {ex}")
             self.content.controls[0].controls[1].value = "Error loading project"
             self.update()
     
-    def _load_comments(self):
-        """Load project comments"""
+    def _show_comments(self, comments):
+        """Render the newest page of project comments"""
+        if not comments:
+            self.comments_container.controls = [
+                ft.Text("No comments yet. Be the first to comment!", color=ft.Colors.ON_SURFACE)
+            ]
+        else:
+            self.comments_container.controls = self._comment_cards(comments)
+        self.load_older_button.visible = self.comments_cursor is not None
+    
+    async def _on_comments_scroll(self, e: ft.OnScrollEvent):
+        if e.max_scroll_extent - e.pixels < COMMENTS_PREFETCH_PX:
+            await self._load_older_comments(e)
+    
+    async def _load_older_comments(self, e):
+        """Append the next page of older comments (one fetch at a time)"""
+        if not self.comments_cursor or self.loading_older:
+            return
+        self.loading_older = True
         try:
-            comments = server_get(f"/comments?project_id={self.project_id}")
-            
-            if not comments:
-                self.comments_container.controls = [
-                    ft.Text("No comments yet. Be the first to comment!", color=ft.Colors.ON_SURFACE)
-                ]
-            else:
-                self.comments_container.controls = [
-                    CommentCard(comment) for comment in comments
-                ]
-            
-            self.update()
+            store = get_sync_store(self.page.session_username)
+            comments, self.comments_cursor = await store.load_comments_page_async(
+                self.project_id, limit=COMMENTS_PAGE_SIZE, cursor=self.comments_cursor
+            )
+            self.comments_container.controls = self._comment_cards(self._shown_comments() + comments)
+            # The button stays as a fallback for when the list is too short to scroll
+            self.load_older_button.visible = self.comments_cursor is not None
+            self.comments_container.update()
+            self.load_older_button.update()
             
         except APIClientError as ex:
-            print(f"Failed to load comments: {ex}")
+            print(f"Failed to load older comments: {ex}")
+        
+        finally:
+            self.loading_older = False
+    
+    async def _sync_comments(self):
+        """Prepend comments posted since the thread was loaded, without reloading it"""
+        try:
+            changed = await get_sync_store(self.page.session_username).sync_comments_async(self.project_id)
+        except APIClientError as ex:
+            print(f"Failed to sync comments: {ex}")
+            return
+        
+        self._prepend_comments(changed)
+    
+    def _shown_comments(self):
+        return [control.data for control in self.comments_container.controls if isinstance(control, CommentCard)]
+    
+    def _comment_cards(self, comments):
+        """Cards for `comments` in order, reusing the ones already shown"""
+        return reconcile(
+            self.comments_container.controls,
+            comments,
+            create=CommentCard,
+            patch=lambda card, comment: card.set_data(comment),
+        )
+    
+    def _prepend_comments(self, comments):
+        """Put new or edited comments on top, patching their old cards"""
+        changed_ids = {comment["id"] for comment in comments}
+        kept = [comment for comment in self._shown_comments() if comment["id"] not in changed_ids]
+        self.comments_container.controls = self._comment_cards(comments + kept)
+        self.comments_container.update()
+    
+    def _on_store_change(self, kind, records):
+        """Apply comments pushed by the server while the project is open"""
+        if kind == "comments" and records:
+            self._prepend_comments(records)
     
-    def _send_comment(self, e):
+    async def _send_comment(self, e):
         """Send a new comment"""
         text = self.comment_field.value.strip()
         if not text:
@@ -229,7 +333,7 @@ class ProjectView(ft.Container):
                 except ValueError:
                     pass
             
-            server_post("/comments", {
+            await async_api_client.server_post("/comments", {
                 "project_id": self.project_id,
                 "username": self.page.session_username,
                 "text": text,
@@ -240,8 +344,8 @@ class ProjectView(ft.Container):
             self.comment_field.value = ""
             self.timestamp_field.value = ""
             
-            # Reload comments
-            self._load_comments()
+            # Fetch only what changed since the comments were loaded
+            await self._sync_comments()
             
         except APIClientError as ex:
             print(f"Failed to send comment: {ex}")
@@ -250,10 +354,10 @@ class ProjectView(ft.Container):
             self.send_button.disabled = False
             self.update()
     
-    def _update_status(self, e):
+    async def _update_status(self, e):
         """Update project status"""
         try:
-            server_patch(f"/projects/{self.project_id}", {
+            await async_api_client.server_patch(f"/projects/{self.project_id}", {
                 "status": self.status_dropdown.value
             })
             
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+
+import pytest
+
+from src.storage import JSONStorage, SQLiteStorage
+
+BACKENDS = ["json", "json-journal", "sqlite"]
+
+
+def open_storage(kind: str, data_dir: str, **journal_options):
+    """A backend on `data_dir`; `journal_options` only apply to the JSON backend."""
+    if kind == "sqlite":
+        return SQLiteStorage(os.path.join(data_dir, "flashgig.db"))
+    journaled = ("requests", "comments") if kind == "json-journal" else ()
+    return JSONStorage(data_dir, journaled=journaled, **journal_options)
+
+
+def comment(n: int, project_id: str = "p1") -> dict:
+    return {"id": f"c{n:05d}", "project_id": project_id, "username": "alice", "text": f"comment {n}"}
+
+
+@pytest.fixture(params=BACKENDS)
+def kind(request):
+    return request.param
+
+
+def test_concurrent_writes_survive_reopen(kind, tmp_path):
+    storage = open_storage(kind, str(tmp_path), compact_every=7, compact_interval=0.01)
+    threads_count, per_thread = 6, 60
+
+    def writer(t: int):
+        for i in range(per_thread):
+            n = t * per_thread + i
+            storage.insert("comments", comment(n, project_id=f"p{t % 2}"))
+            if i % 3 == 0:
+                storage.update("comments", f"c{n:05d}", {"text": f"edited {n}"})
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in range(threads_count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    last_version = storage.version()
+    storage.close()
+
+    reopened = open_storage(kind, str(tmp_path))
+    records = {r["id"]: r for r in reopened.find_in("comments", "project_id", ["p0", "p1"])}
+    assert len(records) == threads_count * per_thread
+    for t in range(threads_count):
+        for i in range(per_thread):
+            n = t * per_thread + i
+            assert records[f"c{n:05d}"]["text"] == (f"edited {n}" if i % 3 == 0 else f"comment {n}")
+    assert reopened.version() == last_version
+    assert reopened.insert("comments", comment(99999))["version"] > last_version
+    reopened.close()
+
+
+def test_journal_replay_after_interrupted_compaction(tmp_path, monkeypatch):
+    storage = open_storage("json-journal", str(tmp_path))
+    for n in range(20):
+        storage.insert("comments", comment(n))
+    for n in range(0, 20, 4):
+        storage.update("comments", f"c{n:05d}", {"text": f"edited {n}"})
+    expected = {r["id"]: r for r in storage.find("comments", project_id="p1")}
+
+    # Crash after the snapshot is written but before the journal is truncated
+    real_replace = os.replace
+
+    def failing_replace(src, dst):
+        if str(dst).endswith(".journal.jsonl"):
+            raise OSError("simulated crash")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        storage.compact("comments")
+    monkeypatch.setattr(os, "replace", real_replace)
+
+    journal_path = tmp_path / "comments.journal.jsonl"
+    with open(journal_path, "ab") as f:
+        f.write(b'{"op": "insert", "record": {"id": "torn"')  # torn last line
+    with open(tmp_path / "comments.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 20  # the snapshot made it to disk
+
+    reopened = open_storage("json-journal", str(tmp_path))
+    records = reopened.find("comments", project_id="p1")
+    assert len(records) == 20
+    assert {r["id"]: r for r in records} == expected
+    assert reopened.get("comments", "torn") is None
+    reopened.close()
+
+
+def test_close_compacts_and_stops_the_compactor(tmp_path):
+    storage = open_storage("json-journal", str(tmp_path), compact_every=5, compact_interval=0.01)
+    for n in range(12):
+        storage.insert("comments", comment(n))
+    storage.close()
+    assert not storage._compactor.is_alive()
+    assert os.path.getsize(tmp_path / "comments.journal.jsonl") == 0
+    with open(tmp_path / "comments.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 12
+
+
+def test_scan_returns_every_match_once_in_insert_order(kind, tmp_path):
+    storage = open_storage(kind, str(tmp_path))
+    for n in range(250):
+        storage.insert("comments", comment(n, project_id=f"p{n % 3}"))
+    wanted = [f"c{n:05d}" for n in range(250) if n % 3 != 2]
+
+    seen, cursor, batches = [], 0, 0
+    while cursor is not None:
+        records, cursor = storage.scan("comments", ("project_id",), ["p0", "p1"], cursor, limit=17)
+        assert len(records) <= 17
+        seen.extend(r["id"] for r in records)
+        batches += 1
+        if batches == 3:
+            # Written mid-scan: shows up at the end
+            storage.insert("comments", comment(500, project_id="p0"))
+            storage.insert("comments", comment(501, project_id="p2"))
+    assert seen == wanted + ["c00500"]
+
+    assert storage.scan("comments", ("project_id",), [], 0) == ([], None)
+    assert storage.scan("comments", ("project_id",), ["nope"], 0) == ([], None)
+    with pytest.raises(ValueError):
+        storage.scan("comments", ("username",), ["alice"], 0)
+    storage.close()
+
+
+def test_scan_over_several_fields(kind, tmp_path):
+    storage = open_storage(kind, str(tmp_path))
+    people = ["alice", "bob", "carol"]
+    for n in range(40):
+        storage.insert("requests", {"id": f"r{n:03d}", "from_username": people[n % 3], "to_username": people[(n + 1) % 3]})
+    seen, cursor = [], 0
+    while cursor is not None:
+        records, cursor = storage.scan("requests", ("from_username", "to_username"), ["alice"], cursor, limit=4)
+        seen.extend(r["id"] for r in records)
+    expected = [f"r{n:03d}" for n in range(40) if "alice" in (people[n % 3], people[(n + 1) % 3])]
+    assert seen == expected
+    storage.close()
+
+
+def test_find_changed_is_ordered_by_version(kind, tmp_path):
+    storage = open_storage(kind, str(tmp_path))
+    for n in range(10):
+        storage.insert("comments", comment(n))
+    since = storage.version()
+    for n in (7, 2, 9, 2):
+        storage.update("comments", f"c{n:05d}", {"text": f"edited {n}"})
+    storage.insert("comments", comment(10))
+
+    changed = storage.find_changed("comments", since)
+    assert [r["id"] for r in changed] == ["c00007", "c00009", "c00002", "c00010"]
+    versions = [r["version"] for r in changed]
+    assert versions == sorted(versions) and all(v > since for v in versions)
+
+    # since=0 means "everything", including records from before versions existed
+    assert {r["id"] for r in storage.find_changed("comments", 0)} == {f"c{n:05d}" for n in range(11)}
+    assert storage.find_changed("comments", storage.version()) == []
+    storage.close()
@@ -0,0 +1,77 @@
+import json
+import random
+
+import pytest
+
+from api_client import JSONArrayParser, NDJSONParser
+
+RECORDS = [
+    {"id": "c1", "text": "plain"},
+    {"id": "c2", "text": "brackets ] [ and braces } { and a comma ,"},
+    {"id": "c3", "text": "escaped \" quote and \\ backslash\nnewline"},
+    {"id": "c4", "text": "ünïcödé ✓ 🎬 中文"},
+    {"id": "c5", "nested": {"list": [1, 2.5, -3e2, None, True, False], "empty": {}}},
+    12345,
+    "a bare string",
+    [],
+    None,
+]
+
+
+def split_randomly(data: bytes, rng: random.Random):
+    """`data` cut at random points, including inside multi-byte UTF-8 characters."""
+    cuts = sorted(rng.sample(range(1, len(data)), rng.randint(1, min(40, len(data) - 1))))
+    return [data[a:b] for a, b in zip([0] + cuts, cuts + [len(data)])]
+
+
+def parse(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.feed(b"", final=True))
+    return items
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_json_array_any_chunk_boundaries(seed):
+    body = json.dumps(RECORDS, ensure_ascii=False, indent=seed % 3 or None).encode("utf-8")
+    assert parse(JSONArrayParser(), split_randomly(body, random.Random(seed))) == RECORDS
+
+
+def test_json_array_byte_by_byte_and_incremental():
+    body = json.dumps(RECORDS, ensure_ascii=False).encode("utf-8")
+    parser = JSONArrayParser()
+    items = []
+    for i in range(len(body)):
+        items.extend(parser.feed(body[i:i + 1]))
+        # Nothing is returned before it is complete
+        assert items == RECORDS[:len(items)]
+    items.extend(parser.feed(b"", final=True))
+    assert items == RECORDS
+
+
+def test_json_array_number_at_chunk_end_waits_for_more():
+    parser = JSONArrayParser()
+    assert parser.feed(b"[12") == []
+    assert parser.feed(b"34, 5") == [1234]
+    assert parser.feed(b"]", final=True) == [5]
+
+
+@pytest.mark.parametrize("body", [b"", b"[", b'[{"a": 1}', b'[1 2]', b'{"a": 1}', b"[1,,2]"])
+def test_json_array_malformed(body):
+    with pytest.raises(ValueError):
+        parse(JSONArrayParser(), [body])
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_ndjson_any_chunk_boundaries(seed):
+    lines = [json.dumps(r, ensure_ascii=False) for r in RECORDS]
+    body = ("\n".join(lines) + ("\n" if seed % 2 else "")).encode("utf-8")
+    assert parse(NDJSONParser(), split_randomly(body, random.Random(seed))) == RECORDS
+
+
+def test_ndjson_skips_blank_lines_and_keeps_partial_lines():
+    parser = NDJSONParser()
+    assert parser.feed(b'{"a": 1}\n\n{"b":') == [{"a": 1}]
+    assert parser.feed(b" 2}\r\n") == [{"b": 2}]
+    assert parser.feed(b"", final=True) == []